@@ -4,7 +4,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 
 # This script parses geonames' allCountries.txt into a filtered TSV of cities with enriched data for country, subdivision and alternate city names as search tokens.
-# Country and subdivision data are loaded from separate TSV files.
+# Country and subdivision data are loaded from their data packs.
 # Cities are filtered based on feature codes and population. We only want to include actual populated settlements as allCountries.txt contains many other geographical features.
 # allCountries.txt (1.64GB) must be manually downloaded to the src folder from https://download.geonames.org/export/dump/
 
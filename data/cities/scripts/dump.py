@@ -4,7 +4,7 @@ from localis.models import CityModel
 
 def dump(cities: list[CityModel]) -> None:
     print(f"Dumping {len(cities)} cities...")
-    dump_data(cities, DATA_PATH / "cities" / "cities.tsv")
+    dump_data_pack(cities, DATA_PATH / "cities" / "cities.pack")
 
     print("Dumping cities lookup indexes...")
     dump_lookup_index(cities, DATA_PATH / "cities" / "cities_lookup_index.tsv")
@@ -13,4 +13,4 @@ def dump(cities: list[CityModel]) -> None:
     dump_filter_index(cities, DATA_PATH / "cities" / "cities_filter_index.tsv")
 
     print("Dumping cities search index...")
-    dump_search_index(cities, DATA_PATH / "cities" / "cities_search_index.tsv")
+    dump_search_index(cities, DATA_PATH / "cities" / "cities_search_index.pack")
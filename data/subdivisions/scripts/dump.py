@@ -10,7 +10,7 @@ def dump(sub_map: SubdivisionMap):
     # ensure subdivisions are sorted by admin level so level 2 subdivisions are processed after their level 1 parents
     # subdivisions.sort(key=lambda s: s.admin_level)
     print(f"Dumping {len(subdivisions)} subdivisions...")
-    dump_data(subdivisions, SUBDIVISIONS_DATA_PATH / "subdivisions.tsv")
+    dump_data_pack(subdivisions, SUBDIVISIONS_DATA_PATH / "subdivisions.pack")
 
     print("Dumping subdivision lookup indexes...")
     dump_lookup_index(
@@ -24,5 +24,5 @@ def dump(sub_map: SubdivisionMap):
 
     print("Dumping subdivision search index...")
     dump_search_index(
-        subdivisions, SUBDIVISIONS_DATA_PATH / "subdivisions_search_index.tsv"
+        subdivisions, SUBDIVISIONS_DATA_PATH / "subdivisions_search_index.pack"
     )
@@ -2,7 +2,7 @@ from pathlib import Path
 import csv
 from collections import defaultdict
 from localis.models import Model, CountryModel, SubdivisionModel
-import base64
+from localis.pack import DataPack, write_data_pack, write_postings_pack
 
 BASE_PATH = Path(__file__).parent
 DATA_PATH = BASE_PATH.parent / "src" / "localis" / "data"
@@ -14,12 +14,11 @@ CITIES_SRC_PATH = BASE_PATH / "cities" / "src"
 def load_countries() -> dict[str, CountryModel]:
     ALPHA2_INDEX = 1
     print("Loading countries...")
-    with open(DATA_PATH / "countries" / "countries.tsv", "r", encoding="utf-8") as f:
-        reader = csv.reader(f, delimiter="\t")
-        return {
-            row[ALPHA2_INDEX]: CountryModel(id, *row)
-            for id, row in enumerate(reader, start=1)
-        }
+    pack = DataPack(DATA_PATH / "countries" / "countries.pack")
+    try:
+        return {row[ALPHA2_INDEX]: CountryModel(id, *row) for id, row in pack.rows()}
+    finally:
+        pack.close()
 
 
 def load_subdivisions(
@@ -28,24 +27,21 @@ def load_subdivisions(
     print("Loading Subdivisions...")
     GEONAMES_CODE_INDEX = 1
     COUNTRY_INDEX = 7
-    with open(
-        DATA_PATH / "subdivisions" / "subdivisions.tsv", "r", encoding="utf-8"
-    ) as f:
-
+    pack = DataPack(DATA_PATH / "subdivisions" / "subdivisions.pack")
+    try:
         subdivisions: dict[str, SubdivisionModel] = {}
-        reader = csv.reader(f, delimiter="\t")
-        for id, row in enumerate(reader, start=1):
-            country = [c for c in countries.values() if c.id == int(row[COUNTRY_INDEX])]
+        for id, row in pack.rows():
+            country = [c for c in countries.values() if c.id == row[COUNTRY_INDEX]]
             row = row[:COUNTRY_INDEX] + country
             subdivisions[row[GEONAMES_CODE_INDEX]] = SubdivisionModel(id, *row)
         return subdivisions
+    finally:
+        pack.close()
 
 
-def dump_data(data: list[Model], path: Path) -> None:
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, delimiter="\t")
-        for item in data:
-            writer.writerow(item.to_row())
+def dump_data_pack(data: list[Model], path: Path) -> None:
+    """Compiles the rows of the data into a memory-mappable binary data pack (see localis.pack)."""
+    write_data_pack((item.to_row() for item in data), data[0].ROW_FORMAT, path)
 
 
 def dump_lookup_index(data: list[Model], path: Path) -> None:
@@ -70,42 +66,6 @@ def dump_filter_index(data: list[Model], path: Path) -> None:
             writer.writerow(row)
 
 
-def _delta_encode(ids: list[int]) -> list[int]:
-    ids.sort()
-    out = []
-    prev = 0
-    for i in ids:
-        out.append(i - prev)
-        prev = i
-    return out
-
-
-def _varint_encode(value: int) -> bytes:
-    out = bytearray()
-    while True:
-        b = value & 0x7F
-        value >>= 7
-        if value:
-            out.append(b | 0x80)
-        else:
-            out.append(b)
-            break
-    return bytes(out)
-
-
-def encode_id_list(ids: set[int]) -> str:
-    """Convert {1,5,6,...} → base64(varint(delta(ids)))"""
-    deltas = _delta_encode(list(ids))
-
-    # concat varints
-    buf = bytearray()
-    for d in deltas:
-        buf.extend(_varint_encode(d))
-
-    # Base64 encode for safe TSV storage
-    return base64.b64encode(buf).decode("ascii")
-
-
 def dump_search_index(data: list[Model], path: Path) -> None:
     index: dict[str, set[int]] = defaultdict(set)
 
@@ -114,10 +74,4 @@ def dump_search_index(data: list[Model], path: Path) -> None:
         for trigram in item.extract_search_trigrams():
             index[trigram].add(item.id)
 
-    # Write compressed format
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f, delimiter="\t")
-
-        for trigram, ids in index.items():
-            encoded = encode_id_list(ids)
-            writer.writerow([trigram, encoded])
+    write_postings_pack(index, path)
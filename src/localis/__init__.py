@@ -1,5 +1,61 @@
 # core types and api singletons
 from .models import Country, CountryBase, Subdivision, SubdivisionBase, City
-from .registries.country_registry import countries
-from .registries.subdivision_registry import subdivisions
-from .registries.city_registry import cities
+from threading import RLock
+from typing import TYPE_CHECKING
+import importlib
+
+if TYPE_CHECKING:
+    from . import registries
+    from .registries import CountryRegistry, SubdivisionRegistry, CityRegistry
+
+    countries: CountryRegistry
+    subdivisions: SubdivisionRegistry
+    cities: CityRegistry
+
+REGISTRY_NAMES = ("countries", "subdivisions", "cities")
+# subpackages imported on first access, e.g. localis.registries after a bare import localis
+SUBPACKAGES = ("registries",)
+
+# reentrant so building cities can resolve the countries and subdivisions it depends on
+_registry_lock = RLock()
+
+
+def _create_registry(name: str):
+    from .registries import CountryRegistry, SubdivisionRegistry, CityRegistry
+
+    if name == "countries":
+        return CountryRegistry()
+    if name == "subdivisions":
+        return SubdivisionRegistry(countries=__getattr__("countries"))
+    return CityRegistry(
+        countries=__getattr__("countries"),
+        subdivisions=__getattr__("subdivisions"),
+    )
+
+
+def __getattr__(name: str):
+    """Creates the registry singletons on first access, so importing localis doesn't load any data."""
+    if name in SUBPACKAGES:
+        module = globals()[name] = importlib.import_module(f".{name}", __name__)
+        return module
+    if name not in REGISTRY_NAMES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    with _registry_lock:
+        registry = globals().get(name)
+        if registry is None:
+            # once set as a module global, __getattr__ is no longer called for this name
+            registry = globals()[name] = _create_registry(name)
+    return registry
+
+
+def __dir__():
+    return sorted(set(globals()) | set(REGISTRY_NAMES) | set(SUBPACKAGES))
+
+
+def preload(*names: str, indexes: bool = False) -> None:
+    """Loads the given registries (all by default) now rather than on first access. Set indexes=True to also load their lookup, filter and search indexes."""
+    for name in names or REGISTRY_NAMES:
+        registry = __getattr__(name)
+        if indexes:
+            registry.load_all()
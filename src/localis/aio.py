@@ -0,0 +1,117 @@
+# asyncio facade over the registry singletons. Every call runs in an executor so loading data, building indexes
+# and scoring candidates never block the event loop.
+import asyncio
+from array import array
+from concurrent.futures import Executor
+from copy import deepcopy
+from functools import partial
+from typing import Any, Callable, Generic, Iterable, TypeVar
+import localis
+from localis.models import DTO, Country, Subdivision, City
+
+T = TypeVar("T", bound=DTO)
+
+_executor: Executor | None = None
+
+
+def set_executor(executor: Executor | None) -> None:
+    """Sets the executor registry calls run in. None (default) uses the event loop's default executor."""
+    global _executor
+    _executor = executor
+
+
+async def _run(fn: Callable, *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+
+class AsyncRegistry(Generic[T]):
+    """Awaitable view of one of the localis registry singletons. Identical calls that are already in flight are
+    coalesced into one executor job, each caller receiving its own deep copy of the result.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._inflight: dict[tuple, asyncio.Future] = {}
+
+    async def _registry(self):
+        registry = vars(localis).get(self._name)
+        if registry is None:
+            # the first access loads the registry's data, so it runs off-loop as well
+            registry = await _run(getattr, localis, self._name)
+        return registry
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        registry = await self._registry()
+        run = getattr(registry, method)
+
+        key = (asyncio.get_running_loop(), method, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # unhashable arguments (e.g. a list of queries) are not coalesced
+            return await _run(run, *args, **kwargs)
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(_run(run, *args, **kwargs))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shielded so a cancelled caller doesn't cancel the job for everyone else waiting on it, and deep copied so
+        # one caller mutating its results (or their items and explanation) doesn't change the others'
+        return deepcopy(await asyncio.shield(future))
+
+    async def warmup(self) -> None:
+        """Loads the registry and all of its indexes."""
+        registry = await self._registry()
+        await _run(registry.load_all)
+
+    async def get(self, id: int) -> T | None:
+        return await self._call("get", id)
+
+    async def lookup(self, identifier: str | int) -> T | None:
+        return await self._call("lookup", identifier)
+
+    async def complete(self, prefix: str, limit: int = 10, **kwargs) -> list[T]:
+        return await self._call("complete", prefix, limit=limit, **kwargs)
+
+    async def filter(self, **kwargs) -> list[T]:
+        return await self._call("filter", **kwargs)
+
+    async def count(self, **filters) -> int:
+        return await self._call("count", **filters)
+
+    async def exists(self, **filters) -> bool:
+        return await self._call("exists", **filters)
+
+    async def ids(self, **filters) -> array:
+        return await self._call("ids", **filters)
+
+    async def search(
+        self, query: str, limit: int = None, **kwargs
+    ) -> list[tuple[T, float]]:
+        return await self._call("search", query, limit=limit, **kwargs)
+
+    async def lookup_many(
+        self, identifiers: Iterable[str | int], workers: int = None
+    ) -> list[T | None]:
+        return await self._call("lookup_many", tuple(identifiers), workers=workers)
+
+    async def search_many(
+        self, queries: Iterable[str], limit: int = None, workers: int = None, **kwargs
+    ) -> list[list[tuple[T, float]]]:
+        return await self._call(
+            "search_many", tuple(queries), limit=limit, workers=workers, **kwargs
+        )
+
+
+countries: AsyncRegistry[Country] = AsyncRegistry("countries")
+subdivisions: AsyncRegistry[Subdivision] = AsyncRegistry("subdivisions")
+cities: AsyncRegistry[City] = AsyncRegistry("cities")
+
+
+async def warmup(*names: str) -> None:
+    """Async counterpart of localis.preload(indexes=True): loads the given registries (all by default) and their indexes off-loop."""
+    for name in names or localis.REGISTRY_NAMES:
+        await globals()[name].warmup()
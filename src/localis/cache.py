@@ -0,0 +1,112 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Iterator, TypeVar
+from threading import Lock
+from time import monotonic
+from localis.models import Model
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe, size-bounded mapping that evicts the least recently used entry when full. Entries optionally
+    expire ttl seconds after they were stored. Hits and misses are counted for cache_info().
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: K, default=None) -> V | None:
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at is not None and expires_at <= monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V) -> None:
+        expires_at = monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> dict[str, int | float | None]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class LazyModelCache:
+    """Read-only stand-in for a registry's dict[int, Model] cache that parses a model on first access and keeps
+    the most recently used ones in a bounded LRU. Only row offsets are held for models that are not cached.
+    """
+
+    def __init__(self, loader: Callable[[int], Model], count: int, maxsize: int = 4096):
+        self._loader = loader
+        self._count = count
+        self._models: LRUCache[int, Model] = LRUCache(maxsize)
+
+    def get(self, id: int, default=None) -> Model | None:
+        if not isinstance(id, int) or not 1 <= id <= self._count:
+            return default
+
+        model = self._models.get(id, _MISSING)
+        if model is _MISSING:
+            model = self._loader(id)
+            self._models.put(id, model)
+        return model
+
+    def __getitem__(self, id: int) -> Model:
+        model = self.get(id, _MISSING)
+        if model is _MISSING:
+            raise KeyError(id)
+        return model
+
+    def __contains__(self, id: int) -> bool:
+        return isinstance(id, int) and 1 <= id <= self._count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.keys())
+
+    def keys(self) -> range:
+        return range(1, self._count + 1)
+
+    def values(self) -> Iterator[Model]:
+        return (self[id] for id in self.keys())
+
+    def items(self) -> Iterator[tuple[int, Model]]:
+        return ((id, self[id]) for id in self.keys())
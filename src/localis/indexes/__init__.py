@@ -1,3 +1,9 @@
 from .lookup_index import LookupIndex
-from .filter_index import FilterIndex
-from .search_index import SearchIndex
+from .filter_index import FilterIndex, FilterMatches
+from .search_index import SearchIndex, SearchExplanation, SearchResults
+from .prefix_index import PrefixIndex
+from .token_index import TokenIndex
+from .deletion_index import DeletionIndex
+from .phonetic_index import PhoneticIndex
+from .range_index import RangeIndex, RANGE_OPERATORS
+from .order_index import OrderIndex
@@ -0,0 +1,98 @@
+from localis.indexes.index import Index
+from localis.utils import REMOVE_TABLE
+from rapidfuzz.distance import Levenshtein
+
+
+class DeletionIndex(Index):
+    """SymSpell style index of the names short enough to match a short query: every string reachable by deleting up
+    to max_distance characters from a name maps to that name. A query's own deletions then look up every name within
+    max_distance edits in a bounded number of dict hits, which trigrams can't do for short names where a single typo
+    breaks most of them.
+    """
+
+    MAX_QUERY_LENGTH = 5
+
+    def __init__(
+        self,
+        model_cls,
+        cache,
+        filepath=None,
+        names: dict[str, list[int]] = None,
+        max_distance: int = 2,
+        **kwargs,
+    ):
+        self.source = names or {}
+        self.max_distance = max_distance
+        self.names: list[str] = []
+        self.name_ids: list[list[int]] = []
+        self.deletes: dict[str, int | list[int]] = {}
+        super().__init__(model_cls, cache, filepath, **kwargs)
+
+    def load(self, filepath):
+        max_length = self.MAX_QUERY_LENGTH + self.max_distance
+        names: dict[str, list[int]] = {}
+        for value, ids in self.source.items():
+            if len(value) > max_length and "." not in value and "," not in value:
+                continue
+            name = value.translate(REMOVE_TABLE)
+            if not name or len(name) > max_length:
+                continue
+            if name in names:
+                names[name] = names[name] + ids
+            else:
+                names[name] = ids  # shared with the filter index
+
+        self.names = list(names.keys())
+        self.name_ids = list(names.values())
+
+        # most deletions belong to a single name, which is stored as is rather than in a list
+        deletes = self.deletes
+        for i, name in enumerate(self.names):
+            for key in self._deletions(name, self.max_distance):
+                entry = deletes.get(key)
+                if entry is None:
+                    deletes[key] = i
+                elif type(entry) is int:
+                    deletes[key] = [entry, i]
+                else:
+                    entry.append(i)
+
+    def _deletions(self, s: str, distance: int) -> set[str]:
+        results = {s}
+        frontier = {s}
+        for _ in range(distance):
+            frontier = {f[:i] + f[i + 1 :] for f in frontier for i in range(len(f))}
+            results |= frontier
+        return results
+
+    def distance_for(self, query: str) -> int:
+        """Edits tolerated for a query of this length: none under 3 characters, 1 under 5, then max_distance."""
+        if len(query) < 3:
+            return 0
+        if len(query) < 5:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def candidates(self, query: str, limit: int) -> set[int]:
+        """Returns the IDs of the names within distance_for(query) edits of the query, closest names first until
+        more than limit IDs would be returned."""
+        distance = self.distance_for(query)
+
+        by_distance: list[set[int]] = [set() for _ in range(distance + 1)]
+        for key in self._deletions(query, distance):
+            entry = self.deletes.get(key)
+            if entry is None:
+                continue
+            for i in (entry,) if type(entry) is int else entry:
+                # deletions on both sides overestimate the edits, verify them
+                d = Levenshtein.distance(query, self.names[i], score_cutoff=distance)
+                if d <= distance:
+                    by_distance[d].add(i)
+
+        ids: set[int] = set()
+        for names in by_distance:
+            for i in names:
+                if ids and len(ids) + len(self.name_ids[i]) > limit:
+                    return ids
+                ids.update(self.name_ids[i])
+        return ids
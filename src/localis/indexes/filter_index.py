@@ -1,12 +1,21 @@
 from localis.indexes.index import Index
+from localis.indexes.range_index import RangeIndex
 from localis.utils import normalize
 from collections import defaultdict
+from array import array
+from bisect import bisect_left
+from typing import Any, Callable, Sequence
 import csv
 
+EMPTY_POSTINGS = array("I")
+
 
 class FilterIndex(Index):
+    """Normalized field value -> IDs index of each filter param. The IDs of a value are kept as a sorted array('I'),
+    shared with the indexes built from it, so they must not be modified."""
+
     def __init__(self, model_cls, cache, filepath, **kwargs):
-        self.index: dict[str, dict[str, list[int]]] = {}
+        self.index: dict[str, dict[str, array]] = {}
         super().__init__(model_cls, cache, filepath, **kwargs)
 
     def load(self, filepath):
@@ -14,19 +23,104 @@ class FilterIndex(Index):
             with open(filepath, "r", encoding="utf-8") as f:
                 reader = csv.reader(f, delimiter="\t")
                 params = next(reader)
-                self.index = {p: defaultdict(list) for p in params}
+                self.index = {p: defaultdict(lambda: array("I")) for p in params}
 
                 for id, row in enumerate(reader, start=1):
                     for i, cell in enumerate(row):
                         param = params[i]
                         values = cell.split("|")
                         for value in values:
+                            # rows are read in ID order, so every array stays sorted
                             self.index[param][value].append(id)
         except Exception as e:
             raise e
 
+    def postings(self, filter_kw: str, field_value: str) -> array:
+        """Returns the sorted IDs matching a filter value, without copying them."""
+        # values are stored as normalized strings, numbers included
+        field_value = normalize(str(field_value))
+        return self.index.get(filter_kw, {}).get(field_value, EMPTY_POSTINGS)
+
     def get(self, filter_kw: str, field_value: str) -> set[int]:
-        if isinstance(field_value, str):
-            field_value = normalize(field_value)
-        ids = self.index.get(filter_kw, {}).get(field_value, set())
-        return set(ids)
+        return set(self.postings(filter_kw, field_value))
+
+
+class FilterMatches:
+    """The items matching a set of filters: the sorted IDs of the exact filters (None without any) and the range
+    filters left to apply to them. They can be tested one ID at a time, or collected."""
+
+    # bisecting the IDs for one ID costs about as much as adding this many IDs to a set
+    BISECT_RATIO = 8
+
+    def __init__(
+        self,
+        ids: Sequence[int] | None,
+        ranges: list[tuple[str, str, Any]] = (),
+        range_index: RangeIndex | None = None,
+    ):
+        self.ids = ids
+        self.ranges = list(ranges)
+        self.range_index = range_index
+
+    def estimate(self) -> int:
+        """Returns an upper bound of the number of matches, the size of the narrowest filter."""
+        sizes = [self.range_index.count(*condition) for condition in self.ranges]
+        if self.ids is not None:
+            sizes.append(len(self.ids))
+        return min(sizes)
+
+    def count(self) -> int:
+        """Returns the number of matches. Exact filters alone are counted from their intersected IDs and ranges of a
+        single field from the bisection of their bounds, without collecting any IDs."""
+        if not self.ranges:
+            return len(self.ids)
+        if self.ids is None and len(self.ranges) == 1:
+            return self.range_index.count(*self.ranges[0])
+
+        # bounds of the same field (e.g. population__gt with population__lt) overlap in one slice of its values
+        fields = {field for field, _, _ in self.ranges}
+        if (
+            self.ids is None
+            and len(fields) == 1
+            and all(op != "in" for _, op, _ in self.ranges)
+        ):
+            bounds = [
+                self.range_index.bounds(*condition)[0] for condition in self.ranges
+            ]
+            return max(0, min(hi for _, hi in bounds) - max(lo for lo, _ in bounds))
+        return len(self.resolve())
+
+    def contains(self, lookups: int) -> Callable[[int], bool]:
+        """Returns a test of whether an ID matches, expected to be called about lookups times. The exact filters'
+        IDs are only copied into a set when that costs less than bisecting them on each call.
+        """
+        tests = [self.range_index.contains(*condition) for condition in self.ranges]
+        ids = self.ids
+        if ids is not None and len(ids) <= lookups * self.BISECT_RATIO:
+            tests.insert(0, set(ids).__contains__)
+        elif ids is not None:
+            n = len(ids)
+
+            def bisect_contains(id: int) -> bool:
+                i = bisect_left(ids, id)
+                return i < n and ids[i] == id
+
+            tests.insert(0, bisect_contains)
+
+        if len(tests) == 1:
+            return tests[0]
+        return lambda id: all(test(id) for test in tests)
+
+    def resolve(self) -> Sequence[int]:
+        """Returns the sorted matching IDs. The narrowest range is collected first, the others only checked against
+        its IDs. The returned IDs may be shared with the filter index and must not be modified.
+        """
+        results = self.ids
+        ranges = sorted(
+            self.ranges, key=lambda condition: self.range_index.count(*condition)
+        )
+        for field, op, value in ranges:
+            if results is not None and not results:
+                break
+            results = self.range_index.get(field, op, value, ids=results)
+        return results
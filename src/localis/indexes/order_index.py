@@ -0,0 +1,95 @@
+from localis.indexes.index import Index
+from localis.indexes.filter_index import FilterMatches
+from array import array
+from heapq import nsmallest
+from itertools import islice
+from typing import Callable, Iterable
+
+
+class OrderIndex(Index):
+    """Permutation of all IDs ordered by one field (or by ID), ascending or descending, with ties broken by ID and
+    items without a value last, and the rank of each ID in it. Pages of filter matches are read from the cursor's
+    rank on.
+    """
+
+    # ranking and selecting a match costs about as much as walking this many positions of the permutation
+    WALK_RATIO = 4
+
+    def __init__(
+        self,
+        model_cls,
+        cache,
+        filepath=None,
+        field: str = "name",
+        descending: bool = False,
+        columns: Callable[[str], Iterable[tuple[int, object]]] = None,
+        **kwargs,
+    ):
+        self.field = field
+        self.descending = descending
+        # yields (id, value) of a field for every item, see Registry._column
+        self.columns = columns
+        self.order = array("I")
+        self.rank = array("I")
+        super().__init__(model_cls, cache, filepath, **kwargs)
+
+    def load(self, filepath):
+        size = len(self.cache) + 1
+        if self.field == "id":
+            self.order = array("I", range(1, size))
+            if self.descending:
+                self.order.reverse()
+        else:
+            entries: list[tuple[object, int]] = []
+            missing: list[int] = []
+            for id, value in sorted(self.columns(self.field)):
+                if value is None:
+                    missing.append(id)
+                else:
+                    entries.append((value, id))
+
+            # the sort is stable, even reversed, so equal values stay in ID order
+            entries.sort(key=lambda entry: entry[0], reverse=self.descending)
+            self.order = array("I", (id for _, id in entries))
+            self.order.extend(missing)
+
+        self.rank = array("I", [0]) * size
+        for position, id in enumerate(self.order):
+            self.rank[id] = position
+
+    def page(
+        self,
+        matches: FilterMatches,
+        offset: int = 0,
+        limit: int = None,
+        after: int = None,
+    ) -> list[int]:
+        """Returns the matching IDs in this order, starting after the ID after (which need not match) and skipping
+        offset more, up to limit of them.
+
+        When the matches are dense, the page is found by walking the permutation from the cursor's rank and testing
+        each ID, without collecting the matches. Sparse matches, or a walk running past its expected length, are
+        collected and the lowest ranks after the cursor's selected."""
+        start = 0
+        if after is not None:
+            if not 0 <= after < len(self.rank) or self.order[self.rank[after]] != after:
+                raise ValueError(f"Unknown cursor: {after}")
+            start = self.rank[after] + 1
+
+        count = matches.estimate()
+        if not count:
+            return []
+        stop = None if limit is None else offset + limit
+
+        # the page is expected within stop * remaining / count positions, walking costs at most as much as ranking
+        remaining = len(self.order) - start
+        walk = self.WALK_RATIO * count
+        if stop is not None and 2 * stop * remaining <= walk * count:
+            positions = islice(self.order, start, start + walk)
+            page = list(islice(filter(matches.contains(walk), positions), offset, stop))
+            if len(page) == limit or walk >= remaining:
+                return page
+
+        ranks = filter(start.__le__, map(self.rank.__getitem__, matches.resolve()))
+        ranks = sorted(ranks) if stop is None else nsmallest(stop, ranks)
+        return list(map(self.order.__getitem__, ranks[offset:stop]))
@@ -0,0 +1,48 @@
+from localis.indexes.index import Index
+from localis.utils import phonetic_key
+
+
+class PhoneticIndex(Index):
+    """Inverted index of the phonetic keys of normalized names (see localis.utils.phonetic_key), which finds
+    transliteration variants that share too few trigrams.
+    """
+
+    MIN_KEY_LENGTH = 2
+
+    def __init__(
+        self,
+        model_cls,
+        cache,
+        filepath=None,
+        names: dict[str, list[int]] = None,
+        **kwargs,
+    ):
+        self.source = names or {}
+        self.index: dict[str, list[int]] = {}
+        super().__init__(model_cls, cache, filepath, **kwargs)
+
+    def load(self, filepath):
+        index: dict[str, list[int]] = {}
+        for value, ids in self.source.items():
+            key = phonetic_key(value)
+            if len(key) < self.MIN_KEY_LENGTH:
+                continue
+            if key in index:
+                index[key] = index[key] + ids
+            else:
+                index[key] = ids  # shared with the filter index
+        self.index = index
+
+    def candidates(self, query: str, limit: int) -> set[int]:
+        """Returns the IDs of the names sharing the phonetic key of the query, or of its leading tokens (a query may
+        carry context after the name). Keys matching more than limit IDs are too ambiguous and skipped.
+        """
+        keys = phonetic_key(query).split()
+
+        ids: set[int] = set()
+        for end in range(len(keys), 0, -1):
+            key = " ".join(keys[:end])
+            matches = self.index.get(key) if len(key) >= self.MIN_KEY_LENGTH else None
+            if matches and len(ids) + len(matches) <= limit:
+                ids.update(matches)
+        return ids
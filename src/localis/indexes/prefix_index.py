@@ -0,0 +1,126 @@
+from localis.indexes.index import Index
+from localis.utils import normalize
+from bisect import bisect_left
+from array import array
+from typing import Callable
+import heapq
+
+PREFIX_END = "\U0010ffff"  # sorts after any character a name can continue with
+
+
+class PrefixIndex(Index):
+    """Typeahead index over the normalized names of a registry (or a subset of its IDs), kept as a sorted name array.
+    Prefixes matching more than HEAVY_PREFIX_SIZE names carry their TOP_K best ranked IDs precomputed, so completing
+    any prefix only costs a binary search plus at most HEAVY_PREFIX_SIZE rank comparisons.
+    """
+
+    TOP_K = 10
+    HEAVY_PREFIX_SIZE = 256
+
+    def __init__(
+        self,
+        model_cls,
+        cache,
+        filepath=None,
+        names: dict[str, list[int]] = None,
+        rank: Callable[[int], float] = None,
+        ids: set[int] = None,
+        **kwargs,
+    ):
+        self.source = names or {}
+        # rank of an ID, higher completes first
+        self.rank = rank or (lambda id: 0)
+        self.ids = ids
+        self.names: list[str] = []
+        self.name_ids = array("I")
+        self.name_ranks: list[float] = []
+        self.top: dict[str, list[int]] = {}
+        super().__init__(model_cls, cache, filepath, **kwargs)
+
+    def load(self, filepath):
+        ids = self.ids
+        entries = [
+            (name, id)
+            for name, name_ids in self.source.items()
+            if name
+            for id in name_ids
+            if ids is None or id in ids
+        ]
+        entries.sort()
+
+        self.names = [name for name, _ in entries]
+        self.name_ids = array("I", (id for _, id in entries))
+        self.name_ranks = list(map(self.rank, self.name_ids))
+
+        self._build_top()
+
+    def _build_top(self):
+        # find every heavy prefix by recursively splitting heavy ranges of the sorted names on their next character
+        heavy: dict[str, list[int]] = {}
+        stack = [("", 0, len(self.names))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if hi - lo <= self.HEAVY_PREFIX_SIZE:
+                continue
+            heavy[prefix] = []
+
+            depth = len(prefix)
+            i = bisect_left(
+                self.names, prefix + "\0", lo, hi
+            )  # skip the name equal to the prefix itself
+            while i < hi:
+                child = self.names[i][: depth + 1]
+                end = bisect_left(self.names, child + PREFIX_END, i, hi)
+                stack.append((child, i, end))
+                i = end
+
+        # then fill their top lists in a single pass over the names in rank order, until all of them are full.
+        # Prefixes of a light prefix are light too, so each name stops at its first light prefix.
+        by_rank = sorted(
+            range(len(self.names)), key=self.name_ranks.__getitem__, reverse=True
+        )
+        unfilled = len(heavy)
+        for i in by_rank:
+            if not unfilled:
+                break
+            name = self.names[i]
+            id = self.name_ids[i]
+            for depth in range(len(name) + 1):
+                top = heavy.get(name[:depth])
+                if top is None:
+                    break
+                if len(top) < self.TOP_K and id not in top:
+                    top.append(id)
+                    if len(top) == self.TOP_K:
+                        unfilled -= 1
+
+        self.top = heavy
+
+    def complete(self, prefix: str, limit: int | None = 10) -> list[int]:
+        """Returns the IDs of the best ranked names starting with prefix, all of them if limit is None."""
+        prefix = normalize(prefix) if prefix else ""
+
+        top = self.top.get(prefix)
+        if top is not None and limit is not None and limit <= self.TOP_K:
+            return top[:limit]
+
+        lo = bisect_left(self.names, prefix)
+        hi = bisect_left(self.names, prefix + PREFIX_END, lo)
+
+        results: list[int] = []
+        if limit is None:
+            best = sorted(range(lo, hi), key=self.name_ranks.__getitem__, reverse=True)
+        else:
+            best = heapq.nlargest(
+                # over-fetch to make up for IDs matching more than once through aliases
+                limit * 2,
+                range(lo, hi),
+                key=self.name_ranks.__getitem__,
+            )
+        for i in best:
+            id = self.name_ids[i]
+            if id not in results:
+                results.append(id)
+                if len(results) == limit:
+                    break
+        return results
@@ -0,0 +1,118 @@
+from localis.indexes.index import Index
+from localis.utils import intersect_sorted
+from bisect import bisect_left, bisect_right
+from array import array
+from itertools import chain, compress
+from typing import Callable, Iterable, Sequence
+from math import nan
+
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte", "in")
+
+# bound.__op__(value) of each operator's bound against an item's value, e.g. gt: bound < value
+_SCAN_COMPARISONS = {"gt": "__lt__", "gte": "__le__", "lt": "__gt__", "lte": "__ge__"}
+
+
+class RangeIndex(Index):
+    """Sorted column index of a model's numeric RANGE_FIELDS: for each field, its non-null values in ascending order
+    and the IDs in the same order, so the items within any range of values are found by binary search, and counted
+    without collecting them.
+    """
+
+    # checking an ID's value in Python costs about as much as this many IDs collected and sorted in C
+    PROBE_RATIO = 16
+    # sorting a matching ID costs about as much as scanning this many values of the by-ID column
+    SCAN_RATIO = 2
+
+    def __init__(
+        self,
+        model_cls,
+        cache,
+        filepath=None,
+        fields: Iterable[str] = (),
+        columns: Callable[[str], Iterable[tuple[int, object]]] = None,
+        **kwargs,
+    ):
+        self.fields = tuple(fields)
+        # yields (id, value) of a field for every item, see Registry._column
+        self.columns = columns
+        self.values: dict[str, array] = {}
+        self.ids: dict[str, array] = {}
+        # value of each ID (NaN if it has none), to check a few IDs against a wide range instead of collecting it
+        self.by_id: dict[str, array] = {}
+        super().__init__(model_cls, cache, filepath, **kwargs)
+
+    def load(self, filepath):
+        size = len(self.cache) + 1
+        for field in self.fields:
+            column = sorted(
+                (value, id) for id, value in self.columns(field) if value is not None
+            )
+            self.values[field] = array("d", (value for value, _ in column))
+            self.ids[field] = array("I", (id for _, id in column))
+
+            by_id = self.by_id[field] = array("d", [nan]) * size
+            for value, id in column:
+                by_id[id] = value
+
+    def bounds(self, field: str, op: str, value) -> list[tuple[int, int]]:
+        """Returns the [lo, hi) slices of the field's sorted values satisfying op (gt, gte, lt, lte or in)."""
+        values = self.values[field]
+        if op == "in":
+            return [
+                (bisect_left(values, v), bisect_right(values, v)) for v in set(value)
+            ]
+        if op == "gt":
+            return [(bisect_right(values, value), len(values))]
+        if op == "gte":
+            return [(bisect_left(values, value), len(values))]
+        if op == "lt":
+            return [(0, bisect_left(values, value))]
+        if op == "lte":
+            return [(0, bisect_right(values, value))]
+        raise ValueError(f"Unsupported range operator: {op}")
+
+    def count(self, field: str, op: str, value) -> int:
+        """Returns the number of IDs whose field value satisfies op against value, without collecting them."""
+        return sum(hi - lo for lo, hi in self.bounds(field, op, value))
+
+    def contains(self, field: str, op: str, value) -> Callable[[int], bool]:
+        """Returns a test of whether an ID's field value satisfies op against value, without collecting the range."""
+        by_id = self.by_id[field]
+        if op == "in":
+            values = {float(v) for v in value}
+            return lambda id: by_id[id] in values
+        if op not in _SCAN_COMPARISONS:
+            raise ValueError(f"Unsupported range operator: {op}")
+        compare = getattr(float(value), _SCAN_COMPARISONS[op])
+        return lambda id: compare(by_id[id])
+
+    def get(
+        self, field: str, op: str, value, ids: Sequence[int] | None = None
+    ) -> Sequence[int]:
+        """Returns the sorted IDs whose field value satisfies op against value, or only those among the sorted ids
+        if given. Items without a value never match."""
+        ranges = self.bounds(field, op, value)
+        size = sum(hi - lo for lo, hi in ranges)
+        values = self.values[field]
+        by_id = self.by_id[field]
+
+        # checking a handful of known IDs one by one beats collecting a much wider range
+        if ids is not None and len(ids) * self.PROBE_RATIO < size:
+            bounds = [(values[lo], values[hi - 1]) for lo, hi in ranges if lo < hi]
+            # NaN compares false, so IDs without a value never match
+            return [
+                id
+                for id in ids
+                if any(low <= by_id[id] <= high for low, high in bounds)
+            ]
+
+        # the slices are in value order: most of the table is scanned in ID order instead of sorted
+        if op in _SCAN_COMPARISONS and size * self.SCAN_RATIO > len(by_id):
+            compare = getattr(float(value), _SCAN_COMPARISONS[op])
+            matches = array("I", compress(range(len(by_id)), map(compare, by_id)))
+        else:
+            sorted_ids = self.ids[field]
+            matches = sorted(
+                chain.from_iterable(sorted_ids[lo:hi] for lo, hi in ranges)
+            )
+        return matches if ids is None else intersect_sorted([ids, matches])
@@ -1,8 +1,160 @@
 from localis.models import Model
 from rapidfuzz import fuzz, process
 from localis.indexes.index import Index
-from localis.utils import normalize, generate_trigrams, decode_id_list
-from collections import defaultdict
+from localis.utils import (
+    REMOVE_TABLE,
+    normalize,
+    generate_trigrams,
+    decode_id_list,
+    intersect_sorted,
+    PROBE_RATIO,
+)
+from localis.pack import PostingsPack
+from localis.cache import LRUCache
+from collections import Counter, defaultdict
+from bisect import bisect_left
+from math import log
+from time import perf_counter
+import heapq
+from itertools import chain
+from typing import Callable, Iterable, TYPE_CHECKING
+from dataclasses import dataclass, field
+
+if TYPE_CHECKING:
+    from localis.indexes.token_index import TokenIndex
+    from localis.indexes.deletion_index import DeletionIndex
+    from localis.indexes.phonetic_index import PhoneticIndex
+
+
+class TopK:
+    """Collects the k best (id, score) pairs in a min-heap. k=None keeps everything. Equal scores are ranked by an
+    optional tiebreak value, then by lowest ID so the results don't depend on the order they were pushed in.
+    """
+
+    def __init__(self, k: int | None):
+        self.k = k
+        self._heap: list[tuple[float, float, int]] = []
+
+    @property
+    def is_full(self) -> bool:
+        return self.k is not None and len(self._heap) >= self.k
+
+    @property
+    def threshold(self) -> float:
+        """The score a new result has to beat to get in, the current k-th best."""
+        return self._heap[0][0] if self.is_full and self._heap else 0.0
+
+    def push(self, id: int, score: float, tiebreak: float = 0.0) -> None:
+        if self.k == 0:
+            return
+        entry = (score, tiebreak, -id)
+        if not self.is_full:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> list[tuple[int, float]]:
+        """Returns the collected (id, score) pairs, best first."""
+        return [
+            (-neg_id, score) for score, _, neg_id in sorted(self._heap, reverse=True)
+        ]
+
+
+class SearchResults(list):
+    """A list of (item, score) search results. partial is set when the search ran out of its latency budget (deadline
+    or candidate cap) before scoring every candidate that could make the results, which are then the best found so
+    far."""
+
+    partial: bool = False
+
+    def __init__(self, results: Iterable = (), partial: bool = False):
+        super().__init__(results)
+        self.partial = partial
+
+
+@dataclass(slots=True)
+class SearchExplanation:
+    """What a SearchIndex.search call did and where its time went, filled in when explaining a search. Timings are in
+    milliseconds; the stage timings include the scoring done in them."""
+
+    query: str = ""
+    # the stages that ran, in order, and the one that found a strong match and ended the search, if any
+    stages: list[str] = field(default_factory=list)
+    strong_match_stage: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    trigram_count: int = 0
+    # lengths of the query's posting lists, rarest first
+    posting_sizes: list[int] = field(default_factory=list)
+    # candidates each stage drew, for the trigram stage the documents sharing any trigram that were counted
+    stage_candidates: dict[str, int] = field(default_factory=dict)
+    # new candidates per trigram tier, keyed by the tier's trigram match count
+    tier_candidates: dict[int, int] = field(default_factory=dict)
+    # candidates whose values were actually fuzzy scored
+    scored: int = 0
+    # whether the search ran out of its latency budget, see SearchResults
+    partial: bool = False
+    # for each result, in order, the share of its score each search field (and the prior) contributed
+    fields: list[dict[str, float]] = field(default_factory=list)
+
+    def add_time(self, stage: str, start: float):
+        self.timings[stage] = (
+            self.timings.get(stage, 0.0) + (perf_counter() - start) * 1000.0
+        )
+
+
+@dataclass(slots=True)
+class SearchContext:
+    """Per-query state of a SearchIndex.search call."""
+
+    query: str
+    results: TopK
+    # IDs the search is restricted to, None searches everything
+    scope: set[int] | None = None
+    # the part of the query candidates are drawn from by trigrams, tier by tier even when they could all be scored at
+    # once, None draws them from the whole query. The scoped fallback of _search_tokens sets it to the name tokens
+    # since every candidate in its scope shares the context's trigrams.
+    trigram_query: str | None = None
+    # share of the ranking given to the index's prior (e.g. population) over the fuzzy score
+    prominence: float = 0.0
+    query_token_count: int = 0
+    match_counts: dict[int, int] = field(default_factory=dict)
+    match_tiers: dict[int, list[int]] = field(default_factory=dict)
+    trigram_count: int = 0
+    boundary_trigram_count: int = 0
+    # the query's posting lists, rarest (highest IDF) first, and their IDF weights
+    postings: list = field(default_factory=list)
+    weights: list[float] = field(default_factory=list)
+    # candidates are only drawn from the first essential_count postings, the rest are only probed for them
+    essential_count: int = 0
+    # IDs scored so far when a search runs in several stages, see SearchIndex._search_tokens
+    scored: set[int] | None = None
+    # non-essential postings that were scanned into a set, so later probes don't scan them again
+    posting_sets: dict[int, set[int]] = field(default_factory=dict)
+    # filled in when explaining the search, see SearchExplanation
+    explain: SearchExplanation | None = None
+    # latency budget: the perf_counter() time to stop scoring at and the candidates left to score, None is unbounded
+    deadline: float | None = None
+    remaining: int | None = None
+    # set once the budget ran out, every stage then stops
+    partial: bool = False
+
+    @property
+    def budgeted(self) -> bool:
+        return self.deadline is not None or self.remaining is not None
+
+    def out_of_budget(self, candidates: bool = True, deadline: bool = True) -> bool:
+        """Returns whether the candidate cap or the deadline ran out, flagging the search as partial."""
+        if (
+            candidates
+            and self.remaining is not None
+            and self.remaining <= 0
+            or deadline
+            and self.deadline is not None
+            and perf_counter() >= self.deadline
+        ):
+            self.partial = True
+            return True
+        return False
 
 
 class SearchIndex(Index):
@@ -11,124 +163,577 @@ class SearchIndex(Index):
         model_cls,
         cache,
         filepath,
+        prior: Callable[[Model], float] = None,
         **kwargs,
     ):
         self.NOISE_THRESHOLD = 0.5
         self.STRONG_MATCH_THRESHOLD = 0.8
         self.CANDIDATE_CNT_THRESHOLD = 2000
+        # candidates are visited in prior order in batches of this size when ranking by prominence
+        self.PRIOR_BATCH_SIZE = 256
+        # searches with a latency budget check it between batches of this many candidates, and between chunks of
+        # this many IDs when drawing candidates from a posting list
+        self.BUDGET_BATCH_SIZE = 64
+        self.BUDGET_CHUNK_SIZE = 1024
+        # phonetic keys shared by more names than this are too ambiguous to add as candidates
+        self.PHONETIC_CANDIDATE_LIMIT = 256
+        # posting lists of the postings pack are decoded when looked up, this many of the most recently used are kept
+        self.POSTINGS_CACHE_SIZE = 256
+        self.postings: LRUCache[str, Iterable[int]] = LRUCache(
+            maxsize=self.POSTINGS_CACHE_SIZE
+        )
+
+        # query independent prominence of a document in [0, 1], blended into the score on request
+        self.prior = prior or (lambda model: 0.0)
+
+        # priors and normalized search values, computed the first time a candidate is scored and shared by all
+        # searches; concurrent first scorings of a candidate just compute the same values twice. Only those of the
+        # most recently scored candidates are kept, up to ~90MB of search values for cities.
+        self.MEMO_SIZE = 2**17
+        self.priors: LRUCache[int, float] = LRUCache(maxsize=self.MEMO_SIZE)
+        self.search_values: LRUCache[
+            int, tuple[tuple[str | tuple[str, ...], float], ...]
+        ] = LRUCache(maxsize=self.MEMO_SIZE)
+        self.normalized_values: LRUCache[str, str] = LRUCache(maxsize=self.MEMO_SIZE)
         super().__init__(model_cls, cache, filepath, **kwargs)
 
     def load(self, filepath):
+        if filepath.suffix == ".pack":
+            try:
+                # posting lists are decoded from the pack's mmap when looked up
+                self._pack = PostingsPack(filepath)
+                self.index = self._pack
+            except Exception as e:
+                raise Exception(f"Failed to load search index from {filepath}: {e}")
+            return
+
         try:
             with open(filepath, "r", encoding="utf-8") as f:
                 for line in f:
-                    trigram, ids_str = line.strip().split("\t")
+                    # only strip the line break, trigrams may start or end with a space
+                    trigram, ids_str = line.rstrip("\r\n").split("\t")
                     self.index[trigram] = decode_id_list(ids_str)
         except Exception as e:
             raise Exception(f"Failed to load search index from {filepath}: {e}")
 
-    def search(self, query: str, limit=10) -> list[tuple[Model, float]]:
-        if not query:
-            return []
+    def search(
+        self,
+        query: str,
+        limit=10,
+        ids: set[int] | None = None,
+        prominence: float = 0.0,
+        tokens: "TokenIndex | None" = None,
+        deletions: "DeletionIndex | None" = None,
+        phonetics: "PhoneticIndex | None" = None,
+        explain: SearchExplanation | None = None,
+        deadline_ms: float | None = None,
+        max_candidates: int | None = None,
+    ) -> SearchResults:
+        """Fuzzy searches the index, optionally only among the given IDs. With prominence > 0, results are ranked by
+        a blend of their score and their prior, prominence being the share of the prior. A token index lets
+        multi-token queries try exact token matches, a deletion index lets short queries try the names within a few
+        edits and a phonetic index lets queries try the names that sound alike, before falling back to trigrams.
+
+        An explanation passed as explain is filled in with the search's stages, timings and candidate counts.
+
+        deadline_ms and max_candidates cap the time spent and the candidates fuzzy scored. Candidates are scored best
+        first, most shared trigrams first, and once the budget runs out the best results found so far are returned
+        flagged as partial. The deadline is checked before every batch of candidates scored and every chunk of a
+        posting list they are drawn from, so a search can only overrun it by about one batch or chunk.
+        """
+        if not query or ids is not None and not ids:
+            return SearchResults()
+
+        start = perf_counter()
+        # all per-query state lives in the context so concurrent searches don't share anything
+        ctx = SearchContext(
+            query=self._normalize_query(query),
+            results=TopK(limit),
+            scope=ids,
+            prominence=prominence,
+            explain=explain,
+            deadline=None if deadline_ms is None else start + deadline_ms / 1000.0,
+            remaining=max_candidates,
+        )
+        if explain is not None:
+            explain.query = ctx.query
+            explain.add_time("normalize", start)
+        ctx.query_token_count = len(ctx.query.split())
+
+        # small indexes score every entry anyway
+        if len(self.cache if ids is None else ids) < 300:
+            tokens = deletions = phonetics = None
+        if tokens is not None and ctx.query_token_count < 2:
+            tokens = None
+        if deletions is not None and len(ctx.query) > deletions.MAX_QUERY_LENGTH:
+            deletions = None
+        if tokens is not None or deletions is not None or phonetics is not None:
+            ctx.scored = set()
+
+        if not (
+            deletions is not None
+            and self._run_stage(ctx, "deletions", self._search_deletions, deletions)
+            or tokens is not None
+            and self._run_stage(ctx, "tokens", self._search_tokens, tokens)
+            or phonetics is not None
+            and self._run_stage(ctx, "phonetics", self._search_phonetics, phonetics)
+        ):
+            self._run_stage(ctx, "trigrams", self._search_trigrams)
+
+        results = ctx.results.items()
+        if explain is not None:
+            explain.fields = [self._explain_fields(ctx, id) for id, _ in results]
+            explain.partial = ctx.partial
+            explain.add_time("total", start)
+        return SearchResults(
+            [(self.cache[id], score) for id, score in results], partial=ctx.partial
+        )
+
+    def _run_stage(
+        self, ctx: "SearchContext", stage: str, search: Callable, *args
+    ) -> bool:
+        """Runs a search stage, recording it when explaining the search. Returns whether the search is over, because
+        the stage found a strong match or ran out of budget."""
+        explain = ctx.explain
+        if explain is None:
+            return search(ctx, *args) or ctx.partial
+
+        start = perf_counter()
+        explain.stages.append(stage)
+        strong_match = search(ctx, *args)
+        explain.add_time(stage, start)
+        if strong_match:
+            explain.strong_match_stage = stage
+        return strong_match or ctx.partial
+
+    def _explain_fields(self, ctx: "SearchContext", id: int) -> dict[str, float]:
+        """Splits a result's score into the contributions of its search fields (and of its prior when ranking by
+        prominence), which add up to the score."""
+        model = self.cache[id]
+        field_names = [name for name, _, _ in model.get_search_fields()]
+        values = self._get_search_values(id)
 
-        self.query = self._normalize_query(query)
-        self.query_token_count = len(self.query.split())
-        self.match_counts: dict[int, int] = defaultdict(int)
-        self.trigram_count = 0
+        name_score = fuzz.WRatio(ctx.query, values[0][0]) / 100.0
+        field_scores = self._field_scores(ctx, id, name_score)
+        total_weight = sum(weight for _, _, weight in field_scores)
+        share = 1.0 - ctx.prominence
 
-        self._build_match_counts()
-        all_results: dict[int, tuple[Model, float]] = {}
-        scored_ids: set[int] = set()
+        fields = {
+            field_names[i]: share * score * weight / total_weight
+            for i, score, weight in field_scores
+        }
+        if ctx.prominence:
+            fields["prior"] = ctx.prominence * self._get_prior(id)
+        return fields
+
+    def _search_deletions(
+        self, ctx: "SearchContext", deletions: "DeletionIndex"
+    ) -> bool:
+        """Scores the candidates whose names are within a few edits of a short query, as a tier above all trigram
+        tiers. Returns whether a strong match was found."""
+        ids = deletions.candidates(ctx.query, self.CANDIDATE_CNT_THRESHOLD)
+        if ctx.scope is not None:
+            ids &= ctx.scope
+        if ctx.explain is not None:
+            ctx.explain.stage_candidates["deletions"] = len(ids)
+        return bool(ids) and self._score_tier(ctx, list(ids), 1.0)
+
+    def _search_phonetics(
+        self, ctx: "SearchContext", phonetics: "PhoneticIndex"
+    ) -> bool:
+        """Scores the few candidates whose names sound like the query, as a tier above all trigram tiers. Returns
+        whether a strong match was found."""
+        ids = phonetics.candidates(ctx.query, self.PHONETIC_CANDIDATE_LIMIT)
+        if ctx.scope is not None:
+            ids &= ctx.scope
+        if ctx.explain is not None:
+            ctx.explain.stage_candidates["phonetics"] = len(ids)
+        return bool(ids) and self._score_tier(ctx, list(ids), 1.0)
+
+    def _search_tokens(self, ctx: "SearchContext", tokens: "TokenIndex") -> bool:
+        """Scores the candidates matching every query token exactly, as a tier above all trigram tiers. Failing a strong
+        match, searches the trigrams of the leading name tokens among the candidates matching the query's trailing
+        context tokens (e.g. a misspelled city in an exactly spelled country), tier by tier as with an unscoped search.
+        The exact matches only seed the top k: the search goes on into the trigram tiers unless it is full and none of
+        them can beat its threshold. A strong match of the scoped search ends it, since lower tiers of the context's
+        candidates only share its trigrams. Returns whether the search is over."""
+        query_tokens = ctx.query.split()
+        exact, context_ids, name_count = tokens.candidates(
+            query_tokens, self.CANDIDATE_CNT_THRESHOLD
+        )
+
+        if ctx.scope is not None:
+            exact &= ctx.scope
+            if context_ids is not None:
+                context_ids &= ctx.scope
+        if ctx.explain is not None:
+            ctx.explain.stage_candidates["tokens"] = len(exact)
+
+        if exact and self._score_tier(ctx, list(exact), 1.0):
+            results = ctx.results
+            return results.is_full and self._blend(ctx, 1.0, 1.0) <= results.threshold
 
-        candidate_count = len(self.match_counts)
+        if context_ids and len(context_ids) < len(
+            self.cache if ctx.scope is None else ctx.scope
+        ):
+            scoped = SearchContext(
+                query=ctx.query,
+                results=ctx.results,
+                scope=context_ids,
+                trigram_query=" ".join(query_tokens[:name_count]),
+                prominence=ctx.prominence,
+                query_token_count=ctx.query_token_count,
+                scored=ctx.scored,
+                explain=ctx.explain,
+                deadline=ctx.deadline,
+                remaining=ctx.remaining,
+            )
+            strong_match = self._search_trigrams(scoped)
+            ctx.remaining = scoped.remaining
+            ctx.partial = scoped.partial
+            return strong_match
 
-        if candidate_count <= self.CANDIDATE_CNT_THRESHOLD:
-            for id in self.match_counts.keys():
-                candidate = self.cache[id]
-                score = self._score_candidate(candidate)
-                if score >= self.NOISE_THRESHOLD:
-                    all_results[id] = (candidate, score)
-                scored_ids.add(id)
-            return sorted(all_results.values(), key=lambda x: x[1], reverse=True)[
-                :limit
-            ]
+        return False
 
-        for min_trigram_matches in range(self.trigram_count, 1, -1):
-            candidates = self._get_candidates(min_trigram_matches)
+    def _search_trigrams(self, ctx: "SearchContext") -> bool:
+        """Scores the candidates sharing trigrams with the query, tier by tier. Returns whether a strong match was found."""
+        explain = ctx.explain
+        start = perf_counter()
+        self._build_match_counts(ctx)
+        results = ctx.results
 
-            new_candidates = candidates - scored_ids
+        if explain is not None:
+            explain.add_time("postings", start)
+            explain.trigram_count = ctx.trigram_count
+            explain.posting_sizes = [len(p) for p in ctx.postings]
+
+        if (
+            ctx.essential_count == ctx.trigram_count
+            and len(ctx.match_counts) <= self.CANDIDATE_CNT_THRESHOLD
+            and ctx.trigram_query is None
+        ):
+            if explain is not None:
+                explain.stage_candidates["trigrams"] = len(ctx.match_counts)
+                for count, ids in ctx.match_tiers.items():
+                    explain.tier_candidates[count] = len(ids)
+            if not ctx.budgeted:
+                return self._score_tier(ctx, list(ctx.match_counts.keys()), 1.0)
+
+            # best first, so running out of budget leaves the candidates sharing the fewest trigrams unscored
+            match_counts = ctx.match_counts
+            ids = sorted(match_counts, key=match_counts.__getitem__, reverse=True)
+            return self._score_tier(ctx, ids, 1.0)
+
+        for min_trigram_matches in range(ctx.trigram_count, 1, -1):
+            max_score = self._max_tier_score(ctx, min_trigram_matches)
+
+            # tiers only get worse from here, stop once none of them can make the top k
+            if (
+                results.is_full
+                and self._blend(ctx, max_score, 1.0) <= results.threshold
+            ):
+                break
+            if ctx.budgeted and ctx.out_of_budget(candidates=False):
+                break
+
+            # a document missing from all essential postings matches at most the non-essential ones, so the tier is
+            # only complete once fewer than min_trigram_matches postings are non-essential (MaxScore)
+            start = perf_counter()
+            self._add_essential(ctx, ctx.trigram_count - min_trigram_matches + 1)
+
+            # each tier only holds the candidates that weren't already scored in a higher tier
+            new_candidates = self._get_candidates(ctx, min_trigram_matches)
+
+            if explain is not None:
+                explain.add_time("candidates", start)
+                explain.stage_candidates["trigrams"] = len(ctx.match_counts)
+                explain.tier_candidates[min_trigram_matches] = len(new_candidates)
 
             if not new_candidates:
                 continue
 
-            for id in new_candidates:
-                candidate = self.cache[id]
-                score = self._score_candidate(candidate)
-                if score >= self.NOISE_THRESHOLD:
-                    all_results[id] = (candidate, score)
-                scored_ids.add(id)
+            if self._score_tier(ctx, new_candidates, max_score):
+                return True
+            if ctx.partial:
+                break
+
+        return False
 
-            if any(
-                score >= self.STRONG_MATCH_THRESHOLD
-                for _, score in all_results.values()
+    def _score_tier(
+        self, ctx: "SearchContext", ids: list[int], max_score: float
+    ) -> bool:
+        """Scores a tier of candidates whose scores are at most max_score into the results, returning whether one of
+        them is a strong match. When ranking by prominence, candidates are visited by descending prior so the rest of
+        the tier can be skipped once its best possible blend can't make the top k."""
+        results = ctx.results
+
+        if ctx.scored is not None:
+            # candidates already scored by an earlier stage of the same search
+            ids = [id for id in ids if id not in ctx.scored]
+            ctx.scored.update(ids)
+
+        if not ids:
+            return False
+
+        if ctx.prominence:
+            ids = sorted(ids, key=self._get_prior, reverse=True)
+        if ctx.budgeted:
+            batch_size = self.BUDGET_BATCH_SIZE
+        elif ctx.prominence:
+            batch_size = self.PRIOR_BATCH_SIZE
+        else:
+            batch_size = len(ids)
+        batches = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+
+        strong_match = False
+        for batch in batches:
+            if results.is_full and (
+                self._blend(
+                    ctx, max_score, self._get_prior(batch[0]) if ctx.prominence else 0.0
+                )
+                <= results.threshold
             ):
                 break
+            if ctx.budgeted:
+                if ctx.out_of_budget():
+                    break
+                if ctx.remaining is not None:
+                    if len(batch) > ctx.remaining:
+                        batch = batch[: ctx.remaining]
+                        ctx.partial = True
+                    ctx.remaining -= len(batch)
+
+            if ctx.explain is not None:
+                start = perf_counter()
+                scored = self._score_candidates(ctx, batch)
+                ctx.explain.add_time("scoring", start)
+                ctx.explain.scored += len(batch)
+            else:
+                scored = self._score_candidates(ctx, batch)
 
-        sorted_results = sorted(all_results.values(), key=lambda x: x[1], reverse=True)
-        return sorted_results[:limit]
+            for id, score in scored:
+                self._push(ctx, id, score)
+                strong_match = strong_match or score >= self.STRONG_MATCH_THRESHOLD
+        return strong_match
 
-    def _build_match_counts(self):
-        """Builds a mapping of document IDs to the count of matching trigrams with the query."""
-        index = self.index
-        match_counts = self.match_counts
+    def _blend(self, ctx: "SearchContext", score: float, prior: float) -> float:
+        if not ctx.prominence:
+            return score
+        return (1.0 - ctx.prominence) * score + ctx.prominence * prior
 
-        # If the index is small, consider all entries as matches
-        if len(self.cache) < 300:
-            for doc_id in self.cache.keys():
-                match_counts[doc_id] = 1
-            self.trigram_count = 1
+    def _get_prior(self, id: int) -> float:
+        prior = self.priors.get(id)
+        if prior is None:
+            prior = self.prior(self.cache[id])
+            self.priors.put(id, prior)
+        return prior
+
+    def _push(self, ctx: "SearchContext", id: int, score: float):
+        """Adds a scored candidate to the results, breaking ties with equally scored results by IDF weighted trigram overlap."""
+        results = ctx.results
+        if ctx.prominence:
+            score = self._blend(ctx, score, self._get_prior(id))
+        if results.is_full and score < results.threshold:
+            return
+        results.push(id, score, self._match_weight(ctx, id))
+
+    def _match_weight(self, ctx: "SearchContext", id: int) -> float:
+        """Sum of the IDF weights of the query trigrams a document shares with the query."""
+        weight = 0.0
+        for j, posting in enumerate(ctx.postings):
+            posting_set = ctx.posting_sets.get(j)
+            if posting_set is not None:
+                found = id in posting_set
+            else:
+                i = bisect_left(posting, id)
+                found = i < len(posting) and posting[i] == id
+            if found:
+                weight += ctx.weights[j]
+        return weight
+
+    def _max_tier_score(self, ctx: "SearchContext", matches: int) -> float:
+        """Optimistic estimate of the best score a candidate sharing only `matches` of the query's trigrams can reach.
+        A single edit changes at most 3 trigrams, so each 3 missing trigrams cost at least one edit. Trigrams that span
+        a space are not counted as missing since reordering tokens breaks them without lowering token based scores.
+        """
+        missing = ctx.trigram_count - matches - ctx.boundary_trigram_count
+        if missing <= 0:
+            return 1.0
+        min_edits = -(-missing // 3)  # ceil
+        return max(0.0, 1.0 - min_edits / max(len(ctx.query), 1))
+
+    def _posting(self, trigram: str) -> Iterable[int]:
+        """Sorted IDs of the documents with the trigram, raises KeyError when there are none."""
+        posting = self.postings.get(trigram)
+        if posting is None:
+            posting = self.index[trigram]
+            self.postings.put(trigram, posting)
+        return posting
+
+    def _build_match_counts(self, ctx: "SearchContext"):
+        """Builds a mapping of document IDs to the count of matching trigrams with the query. When one of the query's
+        posting lists is too long for its candidates to be scored outright, candidates are instead drawn from the
+        rarest postings as the tiers are lowered, see _add_essential."""
+        scope = ctx.scope
+        doc_count = len(self.cache) if scope is None else len(scope)
+
+        # If the index (or the searched part of it) is small, consider all entries as matches
+        if doc_count < 300 and ctx.trigram_query is None:
+            ctx.match_counts = Counter(
+                dict.fromkeys(self.cache.keys() if scope is None else scope, 1)
+            )
+            ctx.trigram_count = 1
+            ctx.essential_count = 1
             return
 
-        for trigram in generate_trigrams(self.query):
+        postings = []
+        for trigram in generate_trigrams(ctx.trigram_query or ctx.query):
             try:
-                ids = index[trigram]
+                posting = self._posting(trigram)
             except KeyError:
                 continue
 
-            self.trigram_count += 1
-            for doc_id in ids:
-                match_counts[doc_id] += 1
+            if scope is not None:
+                # a trigram none of the searched documents has counts as missing from the index
+                posting = intersect_sorted([posting, scope])
+                if not posting:
+                    continue
 
-    def _get_candidates(self, min_matches: int):
-        return {
-            doc_id
-            for doc_id, count in self.match_counts.items()
-            if count >= min_matches
-        }
+            postings.append(posting)
+            if " " in trigram:
+                ctx.boundary_trigram_count += 1
+
+        # a trigram's document frequency is the length of its posting list
+        postings.sort(key=len)
+        ctx.postings = postings
+        ctx.weights = [log(doc_count / len(p)) + 1.0 for p in postings]
+        ctx.trigram_count = len(postings)
+
+        if not postings or len(postings[-1]) > self.CANDIDATE_CNT_THRESHOLD:
+            ctx.match_tiers = defaultdict(list)
+            return
 
-    def _score_candidate(self, candidate: Model) -> float:
+        # every posting list is short: count them all in a single pass in C rather than one Python-level increment
+        # per ID, they have few enough candidates to be scored without tiers
+        ctx.match_counts = Counter(chain.from_iterable(postings))
+        ctx.essential_count = ctx.trigram_count
+        self._build_match_tiers(ctx)
+
+    def _add_essential(self, ctx: "SearchContext", essential_count: int):
+        """Draws candidates from the next rarest postings until essential_count of them are essential. Documents new
+        to the candidates aren't in any earlier essential posting, so only the remaining postings are probed for them
+        to complete their match counts."""
+        while ctx.essential_count < min(essential_count, ctx.trigram_count):
+            i = ctx.essential_count
+            ctx.essential_count += 1
+
+            # with a deadline, long postings are drawn in chunks so that running out of time leaves the candidates
+            # drawn so far to be scored
+            posting = ctx.postings[i]
+            deadline = ctx.deadline is not None
+            chunk_size = self.BUDGET_CHUNK_SIZE if deadline else len(posting)
+            for start in range(0, len(posting), chunk_size):
+                if deadline and ctx.out_of_budget(candidates=False):
+                    return
+
+                new_ids = sorted(
+                    set(posting[start : start + chunk_size]).difference(
+                        ctx.match_counts
+                    )
+                )
+                if not new_ids:
+                    continue
+
+                counts = Counter(new_ids)
+                for j in range(i + 1, ctx.trigram_count):
+                    # a chunk whose counts are incomplete is dropped rather than put in too low a tier
+                    if deadline and ctx.out_of_budget(candidates=False):
+                        return
+                    counts.update(
+                        intersect_sorted([new_ids, self._probe(ctx, j, new_ids)])
+                    )
+
+                # new_ids aren't candidates yet, so their counts are simply added
+                ctx.match_counts.update(counts)
+                for doc_id, count in counts.items():
+                    ctx.match_tiers[count].append(doc_id)
+
+    def _probe(self, ctx: "SearchContext", j: int, ids: list[int]) -> Iterable[int]:
+        """Returns the query's j-th posting list to intersect ids with. A list that isn't much longer than ids would be
+        scanned whole, so it is scanned into a set once per query instead."""
+        posting_set = ctx.posting_sets.get(j)
+        if posting_set is not None:
+            return posting_set
+
+        posting = ctx.postings[j]
+        if len(ids) * PROBE_RATIO >= len(posting):
+            posting_set = ctx.posting_sets[j] = set(posting)
+            return posting_set
+        return posting
+
+    def _build_match_tiers(self, ctx: "SearchContext"):
+        """Groups the matched document IDs by their trigram match count in a single pass."""
+        tiers: dict[int, list[int]] = defaultdict(list)
+        for doc_id, count in ctx.match_counts.items():
+            tiers[count].append(doc_id)
+        ctx.match_tiers = tiers
+
+    def _get_candidates(self, ctx: "SearchContext", min_matches: int) -> list[int]:
+        """Returns the IDs matching exactly min_matches trigrams, i.e. those reached when lowering the tier to min_matches."""
+        return ctx.match_tiers.get(min_matches, [])
+
+    def _score_candidates(
+        self, ctx: "SearchContext", ids: Iterable[int]
+    ) -> list[tuple[int, float]]:
+        """Scores a batch of candidates, returning (id, score) for those above the noise threshold. Names are scored against the query in one batch; secondary fields are only scored for the names that pass."""
+        names = {id: self._get_search_values(id)[0][0] for id in ids}
+
+        name_matches = process.extract(
+            ctx.query,
+            names,
+            scorer=fuzz.WRatio,
+            score_cutoff=self.NOISE_THRESHOLD * 100,
+            limit=None,
+        )
+
+        results = []
+        for _, name_score, id in name_matches:
+            score = self._score_candidate(ctx, id, name_score / 100.0)
+            if score >= self.NOISE_THRESHOLD:
+                results.append((id, score))
+        return results
+
+    def _score_candidate(
+        self, ctx: "SearchContext", id: int, name_score: float
+    ) -> float:
+        """Combines a candidate's name score with the weighted scores of its secondary search fields."""
         score = 0.0
         total_weight = 0.0
+        for _, field_score, weight in self._field_scores(ctx, id, name_score):
+            score += field_score * weight
+            total_weight += weight
+        return score / total_weight
 
-        score_values = candidate.get_search_values()
+    def _field_scores(
+        self, ctx: "SearchContext", id: int, name_score: float
+    ) -> list[tuple[int, float, float]]:
+        """Returns the (search value index, score, weight) of the name and of each secondary search field scoring
+        above the noise threshold. Secondary fields only count for multi-token queries.
+        """
+        score_values = self._get_search_values(id)
 
-        name, weight = next(score_values)  # name is always the first SEARCH_FIELD
-        name_score = fuzz.WRatio(self.query, self._normalize_query(name)) / 100.0
-        if name_score >= self.NOISE_THRESHOLD:
-            score += name_score * weight
-            total_weight += weight
-        else:
-            return 0.0
+        # name is always the first SEARCH_FIELD
+        field_scores = [(0, name_score, score_values[0][1])]
 
-        if self.query_token_count > 1:
-            for field_value, weight in score_values:
+        if ctx.query_token_count > 1:
+            for i, (field_value, weight) in enumerate(score_values[1:], 1):
                 if not field_value:
                     continue
 
-                if isinstance(field_value, list):
+                if isinstance(field_value, tuple):
                     matches = process.extract(
-                        self.query,
-                        [normalize(v) for v in field_value],
+                        ctx.query,
+                        field_value,
                         scorer=fuzz.token_set_ratio,
                         score_cutoff=60,
                         limit=None,
@@ -140,20 +745,37 @@ class SearchIndex(Index):
                         else 0.0
                     )
                 else:
-                    field_score = (
-                        fuzz.token_set_ratio(self.query, normalize(field_value)) / 100.0
-                    )
+                    field_score = fuzz.token_set_ratio(ctx.query, field_value) / 100.0
 
                 if field_score >= self.NOISE_THRESHOLD:
-                    score += field_score * weight
-                    total_weight += weight
+                    field_scores.append((i, field_score, weight))
 
-        return score / total_weight if total_weight > 0 else 0.0
+        return field_scores
 
-    REMOVE_CHARS = (",", ".")
+    def _get_search_values(
+        self, id: int
+    ) -> tuple[tuple[str | tuple[str, ...], float], ...]:
+        """Returns the candidate's (value, weight) search values in query form, normalizing them only the first time the candidate is scored. List values become tuples."""
+        values = self.search_values.get(id)
+        if values is None:
+            values = []
+            for i, (value, weight) in enumerate(self.cache[id].get_search_values()):
+                # names are unique to a candidate, secondary values (admin names, country codes...) are shared
+                norm = self._normalize_query if i == 0 else self._normalize_value
+                if isinstance(value, list):
+                    values.append((tuple(norm(v) for v in value), weight))
+                else:
+                    values.append((norm(value), weight))
+            values = tuple(values)
+            self.search_values.put(id, values)
+        return values
 
-    def _normalize_query(self, text: str) -> str:
-        norm = normalize(text)
+    def _normalize_value(self, value: str) -> str:
+        norm = self.normalized_values.get(value)
+        if norm is None:
+            norm = self._normalize_query(value)
+            self.normalized_values.put(value, norm)
+        return norm
 
-        trans_table = str.maketrans("", "", "".join(self.REMOVE_CHARS))
-        return norm.translate(trans_table)
+    def _normalize_query(self, text: str) -> str:
+        return normalize(text).translate(REMOVE_TABLE)
@@ -0,0 +1,82 @@
+from localis.indexes.index import Index
+from localis.utils import REMOVE_TABLE, intersect_sorted
+from collections import defaultdict
+from itertools import chain
+
+
+class TokenIndex(Index):
+    """Inverted index of whole normalized tokens, split by field: the tokens of an item's names and the tokens of its
+    context (e.g. a city's subdivision and country), so a query can be split into an exactly spelled name and the
+    context narrowing it down.
+    """
+
+    def __init__(
+        self,
+        model_cls,
+        cache,
+        filepath=None,
+        names: dict[str, list[int]] = None,
+        context: list[dict[str, list[int]]] = None,
+        **kwargs,
+    ):
+        self.sources = (names or {}, context or [])
+        self.names: dict[str, list[list[int]]] = {}
+        self.context: dict[str, list[list[int]]] = {}
+        super().__init__(model_cls, cache, filepath, **kwargs)
+
+    def load(self, filepath):
+        names, context = self.sources
+        self.names = self._build(names.items())
+        self.context = self._build(
+            item for values in context for item in values.items()
+        )
+
+    def _build(self, values) -> dict[str, list[list[int]]]:
+        """Maps each token to the ID lists of the values containing it. The filter index's lists are shared as is."""
+        tokens: dict[str, list[list[int]]] = defaultdict(list)
+        for value, ids in values:
+            for token in set(value.translate(REMOVE_TABLE).split()):
+                tokens[token].append(ids)
+        return tokens
+
+    def _get(self, table: dict[str, list[list[int]]], token: str) -> list[int] | None:
+        """Returns the sorted IDs of a token, merging the ID lists of its values the first time it is used."""
+        id_lists = table.get(token)
+        if not id_lists:
+            return None
+        if len(id_lists) > 1:
+            id_lists = table[token] = [sorted(set(chain.from_iterable(id_lists)))]
+        return id_lists[0]
+
+    def candidates(
+        self, tokens: list[str], limit: int
+    ) -> tuple[set[int], set[int] | None, int]:
+        """Splits the query tokens into a leading name part and a trailing context part in every way where each token
+        is an exact hit in its part. Returns the IDs matching all tokens of any split (empty if there are more than
+        limit), the IDs matching the longest context part, or None if no trailing token is a context token, and the
+        number of name tokens before that context part."""
+        exact: set[int] = set()
+        context_ids: set[int] | None = None
+        name_count = len(tokens)
+
+        for split in range(len(tokens), 0, -1):
+            name_lists = [self._get(self.names, t) for t in tokens[:split]]
+            context_lists = [self._get(self.context, t) for t in tokens[split:]]
+            if not all(context_lists):
+                break  # longer context parts all include this token
+
+            context_match = intersect_sorted(context_lists) if context_lists else None
+            if context_lists:
+                context_ids = set(context_match)
+                name_count = split
+                if not context_match:
+                    break
+
+            if all(name_lists):
+                if context_match is not None:
+                    name_lists.append(context_match)
+                exact.update(intersect_sorted(name_lists))
+
+        if len(exact) > limit:
+            exact = set()
+        return exact, context_ids, name_count
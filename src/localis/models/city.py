@@ -35,6 +35,8 @@ class CityModel(City, Model):
             "admin2.geonames_code",
         ),
     }
+    RANGE_FIELDS = ("population",)
+    ORDER_FIELDS = ("name", "population")
     SEARCH_FIELDS = {
         "name": 1.0,
         "admin1.name": 0.6,
@@ -43,6 +45,7 @@ class CityModel(City, Model):
         "country.alpha2": 0.3,
         "country.alpha3": 0.3,
     }
+    ROW_FORMAT = "siiiiiff"
 
     admin1: SubdivisionModel | None
     admin2: SubdivisionModel | None
@@ -86,13 +89,12 @@ class CityModel(City, Model):
         country_id = int(row[COUNTRY_IDX])
         row[COUNTRY_IDX] = country_cache.get(country_id)
 
+        # missing subdivisions are empty in the data file and 0 in the data pack
         admin1_id = row[ADMIN1_IDX]
-        if admin1_id:
-            row[ADMIN1_IDX] = subdivision_cache.get(int(admin1_id))
+        row[ADMIN1_IDX] = subdivision_cache.get(int(admin1_id)) if admin1_id else None
 
         admin2_id = row[ADMIN2_IDX]
-        if admin2_id:
-            row[ADMIN2_IDX] = subdivision_cache.get(int(admin2_id))
+        row[ADMIN2_IDX] = subdivision_cache.get(int(admin2_id)) if admin2_id else None
 
         row[POPULATION_IDX] = int(row[POPULATION_IDX])
         row[LAT_IDX] = float(row[LAT_IDX])
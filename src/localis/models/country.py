@@ -25,6 +25,7 @@ class CountryModel(Country, Model):
         "official_name": 1.0,
         "aliases": 1.0,
     }
+    ROW_FORMAT = "sssssis"
 
     def to_row(self) -> tuple[str | int | None]:
         data = self.to_dict()
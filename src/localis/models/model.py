@@ -29,6 +29,15 @@ class DTO:
 
 class Model(DTO):
     # ----------- Serialization Methods ----------- #
+
+    ROW_FORMAT: str = ""
+    """Column types of to_row() used to compile the binary data pack: s=str, i=int (None as 0), Q=unsigned 64 bit int (None as 0), f=float."""
+
+    @classmethod
+    def column_index(cls, field: str) -> int:
+        """Position of a field in the rows of to_row() and from_row(), which don't hold the ID."""
+        return [f.name for f in fields(cls)].index(field) - 1
+
     def to_dto(self) -> DTO:
         return extract_base(self)
 
@@ -77,6 +86,12 @@ class Model(DTO):
 
         return filter_values
 
+    RANGE_FIELDS: tuple[str] = ()
+    """Numeric fields that can be filtered by range, e.g. population__gte=100_000 (see localis.indexes.RangeIndex)."""
+
+    ORDER_FIELDS: tuple[str] = ("name",)
+    """Fields that filter() results can be ordered by besides the ID, e.g. order_by="-population" (see localis.indexes.OrderIndex)."""
+
     SEARCH_FIELDS: dict[str, float] = {}
     """Fields that are used to identify the obj when searching. Key is the field name (can be nested fields using dot notation), value is the weight for search relevance."""
 
@@ -102,6 +117,11 @@ class Model(DTO):
         return generate_trigrams(normalize(" ".join(values)))
 
     def get_search_values(self):
+        for _, value, weight in self.get_search_fields():
+            yield (value, weight)
+
+    def get_search_fields(self):
+        """Yields the (field name, value, weight) of each SEARCH_FIELDS key the obj has a value for."""
         for field_name, weight in self.SEARCH_FIELDS.items():
             obj = self
             for nested in field_name.split("."):
@@ -111,4 +131,4 @@ class Model(DTO):
                 obj = value
 
             if value is not None:
-                yield (value, weight)
+                yield (field_name, value, weight)
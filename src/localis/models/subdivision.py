@@ -34,6 +34,8 @@ class SubdivisionModel(Subdivision, Model):
         ),
         "admin_level": ("admin_level",),
     }
+    RANGE_FIELDS = ("admin_level",)
+    ORDER_FIELDS = ("name", "admin_level")
     SEARCH_FIELDS = {
         "name": 1.0,
         "iso_suffix": 0.5,
@@ -43,6 +45,7 @@ class SubdivisionModel(Subdivision, Model):
         "country.alpha2": 0.4,
         "country.alpha3": 0.4,
     }
+    ROW_FORMAT = "sssssiQi"
 
     @property
     def iso_suffix(self) -> str:
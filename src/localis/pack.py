@@ -0,0 +1,372 @@
+from pathlib import Path
+from array import array
+from itertools import accumulate
+from operator import itemgetter
+from typing import Iterable, Sequence
+import mmap
+import struct
+import sys
+from threading import Lock
+
+# A data pack is the compiled, memory-mappable form of a registry's data. It is laid out as:
+#   header | column types | fixed-width record table | string offsets (uint32 * string count + 1) | strings
+# Each record holds one row of Model.to_row() values. Strings are deduplicated into a newline separated utf-8
+# table and stored as their index in it, numbers in the narrowest type their column fits, so any row can be read
+# in O(1) without parsing the rest of the file.
+PACK_MAGIC = b"LCPK"
+PACK_VERSION = 2
+PACK_HEADER = struct.Struct(
+    "<4sHHII"
+)  # magic, version, column count, row count, string count
+
+# column type → struct format of its record cell. Integer and float columns of a model's ROW_FORMAT are stored
+# as the narrowest of these their values fit, None as 0.
+PACK_COLUMN_FORMATS = {
+    "s": "I",  # index into the string table
+    "B": "B",  # unsigned 8, 16, 32 and 64 bit
+    "H": "H",
+    "I": "I",
+    "Q": "Q",
+    "i": "i",  # signed 32 bit
+    "f": "d",
+    "F": "i",  # fixed point float, i.e. value * PACK_FLOAT_SCALE
+}
+PACK_FLOAT_SCALE = 10**5
+
+
+def pack_record_struct(column_types: str) -> struct.Struct:
+    return struct.Struct(
+        "<" + "".join(PACK_COLUMN_FORMATS[col] for col in column_types)
+    )
+
+
+def pack_column_type(col: str, values: list) -> str:
+    """Narrowest pack column type for the values of a ROW_FORMAT column."""
+    if col == "s":
+        return "s"
+    if col == "f":
+        scaled = [round(value * PACK_FLOAT_SCALE) for value in values]
+        exact = all(s / PACK_FLOAT_SCALE == v for s, v in zip(scaled, values))
+        if (
+            exact
+            and -(2**31) <= min(scaled, default=0) <= max(scaled, default=0) < 2**31
+        ):
+            return "F"
+        return "f"
+
+    low, high = min(values, default=0), max(values, default=0)
+    if low < 0:
+        return "i"
+    for col in "BHI":
+        if high < 1 << (8 * struct.calcsize(col)):
+            return col
+    return "Q"
+
+
+def write_data_pack(rows: Iterable[Sequence], row_format: str, path: Path) -> None:
+    """Writes rows of values (or their TSV strings) as a data pack, see ROW_FORMAT of Model for the column types."""
+    strings: dict[str, int] = {}
+    columns = []
+    for col, values in zip(row_format, zip(*rows)):
+        if col == "s":
+            values = [
+                strings.setdefault("" if value is None else str(value), len(strings))
+                for value in values
+            ]
+        else:
+            cast = float if col == "f" else int
+            values = [cast(value) if value not in (None, "") else 0 for value in values]
+        columns.append(values)
+
+    if any("\n" in string for string in strings):
+        raise ValueError("Data pack strings cannot contain line breaks")
+
+    column_types = "".join(map(pack_column_type, row_format, columns))
+    fixed = [i for i, col in enumerate(column_types) if col == "F"]
+    for i in fixed:
+        columns[i] = [round(value * PACK_FLOAT_SCALE) for value in columns[i]]
+
+    record = pack_record_struct(column_types)
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array("I", accumulate((len(s) + 1 for s in encoded), initial=0))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    nrows = len(columns[0]) if columns else 0
+    with open(path, "wb") as f:
+        f.write(
+            PACK_HEADER.pack(
+                PACK_MAGIC, PACK_VERSION, len(column_types), nrows, len(encoded)
+            )
+        )
+        f.write(column_types.encode("ascii"))
+        f.write(b"".join(record.pack(*cells) for cells in zip(*columns)))
+        f.write(offsets.tobytes())
+        f.write(b"\n".join(encoded))
+
+
+def _uint32_view(mm: mmap.mmap, start: int, end: int) -> memoryview | array:
+    if sys.byteorder == "little":
+        return memoryview(mm)[start:end].cast("I")
+
+    # big-endian hosts get a byteswapped copy
+    values = array("I")
+    values.frombytes(mm[start:end])
+    values.byteswap()
+    return values
+
+
+class DataPack:
+    """Read-only, memory-mapped view over a compiled data pack. Rows are 1-indexed by localis ID."""
+
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, ncols, self._nrows, nstrings = PACK_HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"Unsupported data pack: {filepath}")
+
+        offset = PACK_HEADER.size
+        self.column_types = self._mm[offset : offset + ncols].decode("ascii")
+        self._record = pack_record_struct(self.column_types)
+        self._string_columns = [
+            i for i, col in enumerate(self.column_types) if col == "s"
+        ]
+        self._fixed_columns = [
+            i for i, col in enumerate(self.column_types) if col == "F"
+        ]
+
+        self._table_offset = offset + ncols
+        table_end = self._table_offset + self._nrows * self._record.size
+        self._strings_offset = table_end + (nstrings + 1) * 4
+        self._string_offsets = _uint32_view(self._mm, table_end, self._strings_offset)
+
+    def __len__(self) -> int:
+        return self._nrows
+
+    def row(self, id: int) -> list[str | int | float]:
+        """Returns the raw row for a localis ID, in the same column order as Model.to_row()."""
+        if not 1 <= id <= self._nrows:
+            raise IndexError(f"Row {id} out of range for {self.filepath}")
+
+        row = list(
+            self._record.unpack_from(
+                self._mm, self._table_offset + (id - 1) * self._record.size
+            )
+        )
+        return self._decode(row, self._string)
+
+    def rows(self):
+        """Yields (id, row) for every row in the pack."""
+        strings = self._strings().__getitem__
+        for id, cells in enumerate(self._record.iter_unpack(self._table()), start=1):
+            yield id, self._decode(list(cells), strings)
+
+    def column(self, index: int):
+        """Yields (id, value) of a single column for every row, decoding only that column."""
+        values = map(itemgetter(index), self._record.iter_unpack(self._table()))
+        col = self.column_types[index]
+        if col == "s":
+            values = map(self._strings().__getitem__, values)
+        elif col == "F":
+            values = (value / PACK_FLOAT_SCALE for value in values)
+        yield from enumerate(values, start=1)
+
+    def _decode(self, row: list, string) -> list[str | int | float]:
+        for i in self._string_columns:
+            row[i] = string(row[i])
+        for i in self._fixed_columns:
+            row[i] /= PACK_FLOAT_SCALE
+        return row
+
+    def _table(self) -> bytes:
+        return self._mm[
+            self._table_offset : self._table_offset + self._nrows * self._record.size
+        ]
+
+    def _string(self, index: int) -> str:
+        offsets = self._string_offsets
+        start = self._strings_offset + offsets[index]
+        return self._mm[start : start + offsets[index + 1] - offsets[index] - 1].decode(
+            "utf-8"
+        )
+
+    def _strings(self) -> list[str]:
+        """Decodes the whole string table at once, for reads that touch every row."""
+        return self._mm[self._strings_offset :].decode("utf-8").split("\n")
+
+    def close(self):
+        if isinstance(self._string_offsets, memoryview):
+            self._string_offsets.release()
+        self._mm.close()
+
+
+class DataFile:
+    """Row reader over a registry's data TSV with the same interface as DataPack. Line offsets are only
+    scanned on the first random access, so bulk loading through rows() stays a single sequential read.
+    """
+
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self._mm: mmap.mmap | None = None
+        self._offsets: array | None = None
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._line_offsets()) - 1
+
+    def _line_offsets(self) -> array:
+        if self._offsets is None:
+            with self._lock:
+                if self._offsets is None:
+                    self._scan_lines()
+        return self._offsets
+
+    def _scan_lines(self):
+        with open(self.filepath, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        offsets = array("Q", [0])
+        pos = mm.find(b"\n")
+        while pos != -1:
+            offsets.append(pos + 1)
+            pos = mm.find(b"\n", pos + 1)
+        if offsets[-1] != len(mm):  # no trailing newline
+            offsets.append(len(mm))
+        self._mm = mm
+        self._offsets = offsets
+
+    def row(self, id: int) -> list[str]:
+        offsets = self._line_offsets()
+        if not 1 <= id < len(offsets):
+            raise IndexError(f"Row {id} out of range for {self.filepath}")
+        line = self._mm[offsets[id - 1] : offsets[id]].decode("utf-8")
+        return line.strip().split("\t")
+
+    def rows(self):
+        with open(self.filepath, "r", encoding="utf-8") as f:
+            for id, line in enumerate(f, start=1):
+                yield id, line.strip().split("\t")
+
+    def column(self, index: int):
+        with open(self.filepath, "r", encoding="utf-8") as f:
+            for id, line in enumerate(f, start=1):
+                yield id, line.strip().split("\t")[index]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+
+
+# A postings pack maps string keys (e.g. trigrams) to sorted lists of localis IDs. It is laid out as:
+#   header | list offsets (uint32 * key count + 1) | delta widths (uint8 * key count) | lists | keys
+# Each list holds its first ID as uint32 followed by the gaps between its IDs, all stored in the narrowest of 1, 2
+# or 4 bytes that fits its largest gap. Keys are utf-8, newline separated.
+POSTINGS_MAGIC = b"LCPL"
+POSTINGS_VERSION = 2
+POSTINGS_HEADER = struct.Struct(
+    "<4sHHII"
+)  # magic, version, reserved, key count, list bytes
+
+# delta width in bytes → array typecode
+POSTINGS_DELTA_TYPES = {1: "B", 2: "H", 4: "I"}
+
+
+def write_postings_pack(index: dict[str, Iterable[int]], path: Path) -> None:
+    """Writes the posting lists of the index as a postings pack."""
+    keys = list(index.keys())
+    offsets = array("I", [0])
+    widths = bytearray()
+    lists = bytearray()
+    for key in keys:
+        ids = sorted(index[key])
+        deltas = [b - a for a, b in zip(ids, ids[1:])]
+        width = next(w for w in (1, 2, 4) if max(deltas, default=0) < 1 << (8 * w))
+        encoded = array("I", ids[:1]), array(POSTINGS_DELTA_TYPES[width], deltas)
+        for values in encoded:
+            if sys.byteorder != "little":
+                values.byteswap()
+            lists.extend(values.tobytes())
+        offsets.append(len(lists))
+        widths.append(width)
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(
+            POSTINGS_HEADER.pack(
+                POSTINGS_MAGIC, POSTINGS_VERSION, 0, len(keys), len(lists)
+            )
+        )
+        f.write(offsets.tobytes())
+        f.write(widths)
+        f.write(lists)
+        f.write("\n".join(keys).encode("utf-8"))
+
+
+class PostingsPack:
+    """Read-only, memory-mapped view over a compiled postings pack. Maps keys to their posting lists as sorted
+    uint32 arrays, decoding a list each time it is looked up."""
+
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, nkeys, size = POSTINGS_HEADER.unpack_from(self._mm, 0)
+        if magic != POSTINGS_MAGIC or version != POSTINGS_VERSION:
+            raise ValueError(f"Unsupported postings pack: {filepath}")
+
+        widths_start = POSTINGS_HEADER.size + (nkeys + 1) * 4
+        self._lists_start = widths_start + nkeys
+        keys_start = self._lists_start + size
+
+        self._offsets = _uint32_view(self._mm, POSTINGS_HEADER.size, widths_start)
+        self._widths = self._mm[widths_start : self._lists_start]
+        keys = self._mm[keys_start:].decode("utf-8").split("\n") if nkeys else []
+        self._positions = {key: i for i, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def __getitem__(self, key: str) -> array:
+        return self._decode(self._positions[key])
+
+    def get(self, key: str, default=None) -> array | None:
+        i = self._positions.get(key)
+        return default if i is None else self._decode(i)
+
+    def keys(self):
+        return self._positions.keys()
+
+    def items(self):
+        """Yields (key, ids) for every posting list."""
+        for key, i in self._positions.items():
+            yield key, self._decode(i)
+
+    def _decode(self, i: int) -> array:
+        start = self._lists_start + self._offsets[i]
+        end = self._lists_start + self._offsets[i + 1]
+        if start == end:
+            return array("I")
+
+        first = array("I")
+        deltas = array(POSTINGS_DELTA_TYPES[self._widths[i]])
+        first.frombytes(self._mm[start : start + 4])
+        deltas.frombytes(self._mm[start + 4 : end])
+        if sys.byteorder != "little":
+            first.byteswap()
+            deltas.byteswap()
+        return array("I", accumulate(deltas, initial=first[0]))
+
+    def close(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._mm.close()
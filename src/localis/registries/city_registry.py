@@ -1,10 +1,16 @@
 from localis.models import CityModel, City
+from math import log10
 from localis.registries import Registry, CountryRegistry, SubdivisionRegistry
 
 
 class CityRegistry(Registry[CityModel]):
     REGISTRY_NAME = "cities"
     _MODEL_CLS = CityModel
+    _TOKEN_CONTEXT_FILTERS = ("subdivision", "country")
+    _COMPLETE_RANK_FIELD = "population"
+
+    POPULATION_SORT_PROMINENCE = 0.3
+    """Share of the ranking given to population by search(population_sort=True)."""
 
     def __init__(
         self, countries: CountryRegistry, subdivisions: SubdivisionRegistry, **kwargs
@@ -26,6 +32,13 @@ class CityRegistry(Registry[CityModel]):
         """Get a city by its GeoNames ID."""
         return super().lookup(identifier)
 
+    def complete(self, prefix: str, limit: int = 10, country: str = None) -> list[City]:
+        """Typeahead completion of city names, most populous first. Optionally within a country (name, alpha2, alpha3)."""
+        return super().complete(prefix, limit, country)
+
+    def _complete_rank(self, population: int | None) -> float:
+        return population or 0
+
     def filter(
         self,
         *,
@@ -33,32 +46,66 @@ class CityRegistry(Registry[CityModel]):
         limit: int = None,
         subdivision: str = None,
         country: str = None,
-        # population__lt: int = None, # TODO: to be implemented
-        # population__gt: int = None, # TODO: to be implemented
+        population__gt: int = None,
+        population__gte: int = None,
+        population__lt: int = None,
+        population__lte: int = None,
         **kwargs,
     ) -> list[City]:
-        """Filter cities by name, subdivision (name, iso/geonames code) or country (name, alpha2, alpha3) with additional filtering by population. Multiple filters use logical AND."""
-        kwargs = {
-            "subdivision": subdivision,
-            "country": country,
-        }
+        """Filter cities by name, subdivision (name, iso/geonames code) or country (name, alpha2, alpha3) with additional filtering by population range. Multiple filters use logical AND."""
+        kwargs.update(
+            subdivision=subdivision,
+            country=country,
+            population__gt=population__gt,
+            population__gte=population__gte,
+            population__lt=population__lt,
+            population__lte=population__lte,
+        )
         results = super().filter(name=name, limit=limit, **kwargs)
         return results
 
     def search(
-        self, query, limit=None, population_sort: bool = False, **kwargs
+        self,
+        query,
+        limit=None,
+        population_sort: bool = False,
+        *,
+        prominence: float = 0.0,
+        name: str = None,
+        subdivision: str = None,
+        country: str = None,
+        explain: bool = False,
+        deadline_ms: float = None,
+        max_candidates: int = None,
+        **kwargs,
     ) -> list[tuple[CityModel, float]]:
-        """Search cities by name, subdivision (name, iso/geonames code), or country (name, alpha2, alpha3). Can optionally sort by population, which is great for autocompletes."""
-        results: list[tuple[City, float]] = super().search(
-            query=query, limit=limit, **kwargs
+        """Search cities by name, subdivision (name, iso/geonames code), or country (name, alpha2, alpha3). Can be scoped with the same filters as filter(). population_sort ranks larger cities higher by blending log-population into the score (see prominence); for autocompletes use complete()."""
+        if population_sort and not prominence:
+            prominence = self.POPULATION_SORT_PROMINENCE
+
+        return super().search(
+            query=query,
+            limit=limit,
+            prominence=prominence,
+            name=name,
+            subdivision=subdivision,
+            country=country,
+            explain=explain,
+            deadline_ms=deadline_ms,
+            max_candidates=max_candidates,
+            **kwargs,
         )
-        if population_sort:
-            results.sort(key=lambda x: x[0].population, reverse=True)
-        return results
+
+    def _search_prior(self, model: CityModel) -> float:
+        # log scale, a city of 100M would be 1.0
+        return min(log10((model.population or 0) + 1) / 8, 1.0)
 
 
 # ----------- SINGLETON ----------- #
-from localis.registries.country_registry import countries
-from localis.registries.subdivision_registry import subdivisions
+def __getattr__(name: str):
+    # the shared instance is created on first access, see localis.__getattr__
+    if name == "cities":
+        import localis
 
-cities: CityRegistry = CityRegistry(countries=countries, subdivisions=subdivisions)
+        return localis.cities
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -10,14 +10,26 @@ class CountryRegistry(Registry[CountryModel]):
         """Get a country by its alpha2, alpha3, numeric code, or id."""
         return super().lookup(identifier)
 
+    def complete(self, prefix: str, limit: int = 10) -> list[Country]:
+        """Typeahead completion of country names and aliases."""
+        return super().complete(prefix, limit)
+
     def filter(self, *, name: str = None, limit: int = None, **kwargs) -> list[Country]:
         """Filter countries by any of its names (name, official_name, or aliases)."""
         return super().filter(name=name, limit=limit, **kwargs)
 
-    def search(self, query, limit=None) -> list[tuple[Country, float]]:
-        """Search countries by any of its names (name, official_name, or aliases)."""
-        return super().search(query, limit)
+    def search(
+        self, query, limit=None, *, name: str = None, **kwargs
+    ) -> list[tuple[Country, float]]:
+        """Search countries by any of its names (name, official_name, or aliases). Can be scoped with the same filters as filter()."""
+        return super().search(query, limit, name=name, **kwargs)
+
 
+# ----------- SINGLETON ----------- #
+def __getattr__(name: str):
+    # the shared instance is created on first access, see localis.__getattr__
+    if name == "countries":
+        import localis
 
-# --------- Singleton --------- #
-countries = CountryRegistry()
+        return localis.countries
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,63 @@
-from typing import Iterator, Generic, TypeVar
+from typing import Any, Callable, Iterable, Iterator, Generic, Sequence, TypeVar
 from pathlib import Path
 from abc import ABC
+from copy import copy
+from threading import Lock, active_count
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
 from localis.models import Model, DTO
-from localis.indexes import FilterIndex, SearchIndex, LookupIndex
+from localis.indexes import (
+    FilterIndex,
+    FilterMatches,
+    SearchIndex,
+    LookupIndex,
+    PrefixIndex,
+    TokenIndex,
+    DeletionIndex,
+    PhoneticIndex,
+    SearchExplanation,
+    SearchResults,
+    RangeIndex,
+    RANGE_OPERATORS,
+    OrderIndex,
+)
+from localis.pack import DataPack, DataFile
+from localis.utils import normalize, intersect_sorted
+from bisect import bisect_left, bisect_right
+from array import array
+from localis.cache import LazyModelCache, LRUCache
 
 T = TypeVar("DTO", bound=DTO)
+V = TypeVar("V")
+
+_MISSING = object()
+
+# ----------- BATCH WORKERS ----------- #
+# Batch queries are fanned out to forked processes, which inherit the parent's registry (and its loaded indexes)
+# through the pool initializer instead of pickling it or loading their own copy. Forking is unsafe whenever other
+# threads exist, whichever thread forks: the child gets a copy of every lock they hold but not the threads that would
+# release them. Batches fan out to threads instead when other threads are running, or when the platform's default
+# start method isn't fork (e.g. spawn on macOS, where forked system libraries can crash).
+_worker_registry: "Registry | None" = None
+
+
+def _can_fork() -> bool:
+    start_method = (
+        multiprocessing.get_start_method(allow_none=True)
+        or multiprocessing.get_all_start_methods()[0]  # the default comes first
+    )
+    return start_method == "fork" and active_count() == 1
+
+
+def _init_worker(registry: "Registry"):
+    global _worker_registry
+    _worker_registry = registry
+
+
+def _map_chunk(method: str, items: list, kwargs: dict) -> list:
+    run = getattr(_worker_registry, method)
+    return [run(item, **kwargs) for item in items]
 
 
 class Registry(Generic[T], ABC):
@@ -12,16 +65,42 @@ class Registry(Generic[T], ABC):
 
     REGISTRY_NAME: str = ""
     _MODEL_CLS: type[Model]
+    _TOKEN_CONTEXT_FILTERS: tuple[str, ...] = ()
+    """Filters whose values are tokens of an item's context rather than its name (e.g. a city's country)."""
+    _COMPLETE_RANK_FIELD: str | None = None
+    """Field whose value ranks the completions of a prefix (see _complete_rank), None ranks them alphabetically."""
 
-    def __init__(self, **kwargs):
+    def __init__(self, lazy: bool = False, cache_size: int = 4096, **kwargs):
         # ---------- Eager loaded ---------- #
-        self._cache: dict[int, Model] | None = None
+        # in lazy mode, models are parsed from their row on first access and only cache_size of them are kept
+        self._lazy = lazy
+        self._cache_size = cache_size
+        self._rows: DataPack | DataFile | None = None
+        self._cache: dict[int, Model] | LazyModelCache | None = None
         self._load_cache()
 
+        # ---------- Opt-in ---------- #
+        self._query_cache: LRUCache | None = None
+        self._deletion_distance: int | None = None
+        self._phonetic_enabled = False
+
         # ---------- Lazy loaded ---------- #
+        # guards the lazy loaders so concurrent first calls build each index only once
+        self._index_lock = Lock()
         self._lookup_index: LookupIndex | None = None
         self._filter_index: FilterIndex | None = None
         self._search_index: SearchIndex | None = None
+        self._token_index: TokenIndex | None = None
+        self._deletion_index: DeletionIndex | None = None
+        self._phonetic_index: PhoneticIndex | None = None
+        self._range_index: RangeIndex | None = None
+        self._prefix_index: PrefixIndex | None = None
+        # completion rank of each ID, read from the _COMPLETE_RANK_FIELD column once for every prefix index
+        self._complete_ranks: array | None = None
+        # per-country prefix indexes, built on the first complete() scoped to that country
+        self._country_prefix_indexes: dict[str, PrefixIndex] = {}
+        # presorted permutations by order_by key (e.g. "-population"), built on the first filter() ordered by it
+        self._order_indexes: dict[str, OrderIndex] = {}
 
     @property
     def _data_path(self) -> Path:
@@ -31,6 +110,10 @@ class Registry(Generic[T], ABC):
     def _data_filepath(self) -> Path:
         return self._data_path / f"{self.REGISTRY_NAME}.tsv"
 
+    @property
+    def _pack_filepath(self) -> Path:
+        return self._data_path / f"{self.REGISTRY_NAME}.pack"
+
     @property
     def _lookup_filepath(self) -> Path:
         return self._data_path / f"{self.REGISTRY_NAME}_lookup_index.tsv"
@@ -41,26 +124,54 @@ class Registry(Generic[T], ABC):
 
     @property
     def _search_filepath(self) -> Path:
+        # the postings pack is shipped, data trees built before packs only hold the base64 encoded TSV
+        pack_filepath = self._data_path / f"{self.REGISTRY_NAME}_search_index.pack"
+        if pack_filepath.exists():
+            return pack_filepath
         return self._data_path / f"{self.REGISTRY_NAME}_search_index.tsv"
 
-    @property
-    def count(self) -> int:
-        return len(self._cache)
+    def _open_rows(self) -> DataPack | DataFile:
+        # the compiled data pack is the shipped source of rows, data trees built before packs only hold the TSV
+        if self._pack_filepath.exists():
+            return DataPack(self._pack_filepath)
 
-    def _load_cache(self) -> dict[int, Model]:
+        if not self._data_filepath.exists():
+            raise FileNotFoundError(f"Data file not found: {self._data_filepath}")
+        return DataFile(self._data_filepath)
+
+    def _load_cache(self) -> dict[int, Model] | LazyModelCache:
         if self._cache is None:
-            # Load data file
-            if not self._data_filepath.exists():
-                raise FileNotFoundError(f"Data file not found: {self._data_filepath}")
+            if self._lazy:
+                self._rows = self._open_rows()
+                self._cache = LazyModelCache(
+                    loader=self._load_model,
+                    count=len(self._rows),
+                    maxsize=self._cache_size,
+                )
+                return
 
             self._cache = {}
+            rows = self._open_rows()
             try:
-                with open(self._data_filepath, "r", encoding="utf-8") as f:
-                    for id, line in enumerate(f, start=1):
-                        row = line.strip().split("\t")
-                        self._cache[id] = self.parse_row(id, row)
-            except Exception as e:
-                raise e
+                for id, row in rows.rows():
+                    self._cache[id] = self.parse_row(id, row)
+            finally:
+                rows.close()
+
+    def _column(self, field: str) -> Iterator[tuple[int, Any]]:
+        """Yields (id, value) of a model field for every item. Lazy registries read it from the raw rows instead of
+        parsing every model, eager ones from the models they already hold."""
+        if not self._lazy:
+            return ((id, getattr(model, field)) for id, model in self._cache.items())
+
+        index = self._MODEL_CLS.column_index(field)
+        col = self._MODEL_CLS.ROW_FORMAT[index]
+        cast = str if col == "s" else float if col == "f" else int
+        # the data file holds strings, the data pack typed values
+        return ((id, cast(value)) for id, value in self._rows.column(index))
+
+    def _load_model(self, id: int) -> Model:
+        return self.parse_row(id, self._rows.row(id))
 
     def parse_row(self, id, row: list[str | int | None]) -> Model:
         return self._MODEL_CLS.from_row(id, row)
@@ -70,32 +181,256 @@ class Registry(Generic[T], ABC):
         self._load_lookup_index()
         self._load_filter_index()
         self._load_search_index()
+        self._load_token_index()
+        self._load_prefix_index()
 
     # ----------- LAZY LOADERS ----------- #
 
     def _load_lookup_index(self):
         if self._lookup_index is None:
-            self._lookup_index = LookupIndex(
-                model_cls=self._MODEL_CLS,
-                cache=self._cache,
-                filepath=self._lookup_filepath,
-            )
+            with self._index_lock:
+                if self._lookup_index is None:
+                    self._lookup_index = LookupIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        filepath=self._lookup_filepath,
+                    )
 
     def _load_filter_index(self):
         if self._filter_index is None:
-            self._filter_index = FilterIndex(
-                model_cls=self._MODEL_CLS,
-                cache=self._cache,
-                filepath=self._filter_filepath,
-            )
+            with self._index_lock:
+                if self._filter_index is None:
+                    self._filter_index = FilterIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        filepath=self._filter_filepath,
+                    )
 
     def _load_search_index(self):
         if self._search_index is None:
-            self._search_index = SearchIndex(
-                model_cls=self._MODEL_CLS,
-                cache=self._cache,
-                filepath=self._search_filepath,
-            )
+            with self._index_lock:
+                if self._search_index is None:
+                    self._search_index = SearchIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        filepath=self._search_filepath,
+                        prior=self._search_prior,
+                    )
+
+    def _load_token_index(self):
+        if self._token_index is None:
+            self._load_filter_index()
+            with self._index_lock:
+                if self._token_index is None:
+                    filters = self._filter_index.index
+                    self._token_index = TokenIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        names=filters["name"],
+                        context=[filters[f] for f in self._TOKEN_CONTEXT_FILTERS],
+                    )
+
+    def _load_deletion_index(self):
+        if self._deletion_index is None:
+            self._load_filter_index()
+            with self._index_lock:
+                if self._deletion_index is None:
+                    self._deletion_index = DeletionIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        names=self._filter_index.index["name"],
+                        max_distance=self._deletion_distance,
+                    )
+
+    def _load_range_index(self):
+        if self._range_index is None:
+            with self._index_lock:
+                if self._range_index is None:
+                    self._range_index = RangeIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        fields=self._MODEL_CLS.RANGE_FIELDS,
+                        columns=self._column,
+                    )
+
+    def _load_order_index(self, order_by: str) -> OrderIndex:
+        order_index = self._order_indexes.get(order_by)
+        if order_index is None:
+            with self._index_lock:
+                order_index = self._order_indexes.get(order_by)
+                if order_index is None:
+                    order_index = self._order_indexes[order_by] = OrderIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        field=order_by.lstrip("-"),
+                        descending=order_by.startswith("-"),
+                        columns=self._column,
+                    )
+        return order_index
+
+    def _load_phonetic_index(self):
+        if self._phonetic_index is None:
+            self._load_filter_index()
+            with self._index_lock:
+                if self._phonetic_index is None:
+                    self._phonetic_index = PhoneticIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        names=self._filter_index.index["name"],
+                    )
+
+    def _load_complete_ranks(self):
+        if self._complete_ranks is None:
+            with self._index_lock:
+                if self._complete_ranks is None:
+                    ranks = array("d", [0.0]) * (len(self._cache) + 1)
+                    if self._COMPLETE_RANK_FIELD is not None:
+                        for id, value in self._column(self._COMPLETE_RANK_FIELD):
+                            ranks[id] = self._complete_rank(value)
+                    self._complete_ranks = ranks
+
+    def _load_prefix_index(self):
+        if self._prefix_index is None:
+            self._load_filter_index()
+            self._load_complete_ranks()
+            with self._index_lock:
+                if self._prefix_index is None:
+                    self._prefix_index = PrefixIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        names=self._filter_index.index["name"],
+                        rank=self._complete_ranks.__getitem__,
+                    )
+
+    def _load_country_prefix_index(self, country: str) -> PrefixIndex | None:
+        key = normalize(country)
+        prefix_index = self._country_prefix_indexes.get(key)
+        if prefix_index is None:
+            self._load_filter_index()
+            ids = self._filter_index.get(filter_kw="country", field_value=country)
+            if not ids:
+                return None
+
+            self._load_complete_ranks()
+            with self._index_lock:
+                prefix_index = self._country_prefix_indexes.get(key)
+                if prefix_index is None:
+                    prefix_index = self._country_prefix_indexes[key] = PrefixIndex(
+                        model_cls=self._MODEL_CLS,
+                        cache=self._cache,
+                        names=self._filter_index.index["name"],
+                        rank=self._complete_ranks.__getitem__,
+                        ids=ids,
+                    )
+        return prefix_index
+
+    def _search_prior(self, model: Model) -> float:
+        """Query independent prominence of an item in [0, 1], blended into search scores by search(prominence=...)."""
+        return 0.0
+
+    def _complete_rank(self, value) -> float:
+        """Ranks the completions of a prefix by their _COMPLETE_RANK_FIELD value, higher first. Ties are broken
+        alphabetically."""
+        return 0
+
+    # ----------- QUERY CACHE ----------- #
+
+    def enable_query_cache(self, maxsize: int = 1024, ttl: float | None = None):
+        """Caches search and lookup results (including empty ones) by their normalized query and options. Up to maxsize results are kept, each for at most ttl seconds if set."""
+        self._query_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+
+    def disable_query_cache(self):
+        self._query_cache = None
+
+    def clear_query_cache(self):
+        if self._query_cache is not None:
+            self._query_cache.clear()
+
+    def query_cache_info(self) -> dict[str, int | float | None] | None:
+        """Hit/miss counters and size of the query cache, or None if it isn't enabled."""
+        if self._query_cache is None:
+            return None
+        return self._query_cache.cache_info()
+
+    def _cached_query(self, key: tuple, run_query: Callable[[], V]) -> V:
+        """Returns the cached results of the query, running and caching them on a miss. Callers get a shallow copy, so
+        mutating it never changes what later hits return."""
+        query_cache = self._query_cache
+        if query_cache is None:
+            return run_query()
+
+        results = query_cache.get(key, _MISSING)
+        if results is _MISSING:
+            results = run_query()
+            # results cut short by a latency budget depend on timing, a later query may do better
+            if not getattr(results, "partial", False):
+                query_cache.put(key, results)
+        return copy(results)
+
+    # ----------- OPT-IN INDEXES ----------- #
+
+    def enable_typo_index(self, max_distance: int = 2):
+        """Opts in to a deletion (SymSpell) index of the short names, built on the next short query. Searches of up to 5 characters then start from the names within max_distance edits (1 under 5 characters, none under 3), at the cost of memory for every deletion of every short name."""
+        with self._index_lock:
+            self._deletion_distance = max_distance
+            self._deletion_index = None
+        self.clear_query_cache()
+
+    def disable_typo_index(self):
+        with self._index_lock:
+            self._deletion_distance = None
+            self._deletion_index = None
+        self.clear_query_cache()
+
+    def enable_phonetic_index(self):
+        """Opts in to a phonetic index of the names, built on the next search. Searches then also consider the few names that sound like the query (e.g. "kyiv" for "kiev"), which share too few trigrams to be found otherwise."""
+        with self._index_lock:
+            self._phonetic_enabled = True
+        self.clear_query_cache()
+
+    def disable_phonetic_index(self):
+        with self._index_lock:
+            self._phonetic_enabled = False
+            self._phonetic_index = None
+        self.clear_query_cache()
+
+    def _map(self, method: str, items: list, workers: int | None, **kwargs) -> list:
+        """Calls a registry method on each item, in order, in a pool of forked workers if workers > 1. Falls back to a pool of threads where forking isn't safe, see _can_fork."""
+        run = getattr(self, method)
+        if not workers or workers <= 1 or len(items) < 2:
+            return [run(item, **kwargs) for item in items]
+
+        if not _can_fork():
+            with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+                return list(pool.map(lambda item: run(item, **kwargs), items))
+
+        chunk_size = max(
+            1, -(-len(items) // (workers * 4))
+        )  # a few chunks per worker to balance load
+        chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as pool:
+            futures = [
+                pool.submit(_map_chunk, method, chunk, kwargs) for chunk in chunks
+            ]
+            return [result for future in futures for result in future.result()]
+
+    def _map_unique(
+        self, method: str, items: list, keys: list, workers: int | None, **kwargs
+    ) -> list:
+        """Like _map, but only runs the first item of each key once and copies its result to the items sharing that key."""
+        unique: dict = {}
+        for key, item in zip(keys, items):
+            unique.setdefault(key, item)
+
+        results = self._map(method, list(unique.values()), workers, **kwargs)
+        by_key = dict(zip(unique.keys(), results))
+        return [by_key[key] for key in keys]
 
     def __iter__(self) -> Iterator[DTO]:
         return iter([m.to_dto() for m in self._cache.values()])
@@ -114,41 +449,255 @@ class Registry(Generic[T], ABC):
         """Fetches a single item by one of its other unique identifiers (use .get() for localis ID)."""
         self._load_lookup_index()
 
-        model_id = self._lookup_index.get(identifier)
+        key = identifier
+        if isinstance(identifier, str):
+            key = normalize(identifier)
+
+        model_id = self._cached_query(
+            ("lookup", key), lambda: self._lookup_index.get(identifier)
+        )
         model = self._cache.get(model_id)
         return model.to_dto() if model else None
 
-    def filter(self, *, name: str = None, limit: int = None, **kwargs) -> list[DTO]:
-        """Filter by exact matches on specified fields with AND logic when filtering by multiple fields. Case insensitive."""
+    def lookup_many(
+        self, identifiers: Iterable[str | int], workers: int = None
+    ) -> list[DTO | None]:
+        """Looks up many identifiers at once, returning results in input order. Identical identifiers are only looked up once."""
+        self._load_lookup_index()
+
+        identifiers = list(identifiers)
+        keys = [normalize(i) if isinstance(i, str) else i for i in identifiers]
+        return self._map_unique("lookup", identifiers, keys, workers)
+
+    def complete(self, prefix: str, limit: int = 10, country: str = None) -> list[DTO]:
+        """Typeahead completion: the best ranked items with one of their names starting with prefix, optionally within a country (name, alpha2, alpha3). limit=None returns all of them."""
+        if country is None:
+            self._load_prefix_index()
+            prefix_index = self._prefix_index
+        else:
+            prefix_index = self._load_country_prefix_index(country)
+            if prefix_index is None:
+                return []
+
+        return [self._cache[id].to_dto() for id in prefix_index.complete(prefix, limit)]
+
+    def _match_filters(self, filters: dict) -> FilterMatches | None:
+        """Returns the matches of all of the given (non-None) filters, or None if there are none. The exact filters' postings are intersected smallest first, without copying a single one. Range filters on the model's RANGE_FIELDS (field__gt, __gte, __lt, __lte or __in) are left to apply to their IDs."""
         self._load_filter_index()
-        kwargs["name"] = name
 
-        filter_kws = {k: v for k, v in kwargs.items() if v is not None}
+        ranges = []
+        postings = []
+        for key, value in filters.items():
+            if value is None:
+                continue
+            if "__" in key:
+                ranges.append(self._parse_range_filter(key, value))
+                continue
+
+            matches = self._filter_index.postings(filter_kw=key, field_value=value)
 
-        results: set[int] = None
+            # short circuit if any field fails to match, all or nothing
+            if not matches:
+                return FilterMatches([])
+            postings.append(matches)
+
+        if not postings and not ranges:
+            return None
+        if ranges:
+            self._load_range_index()
+        ids = intersect_sorted(postings) if postings else None
+        return FilterMatches(ids, ranges, self._range_index)
+
+    def _filter_ids(self, filters: dict) -> Sequence[int] | None:
+        """Returns the sorted IDs matching all of the given (non-None) filters, or None if there are none (see _match_filters). The returned IDs may be shared with the filter index and must not be modified."""
+        matches = self._match_filters(filters)
+        return None if matches is None else matches.resolve()
+
+    def _parse_range_filter(self, key: str, value) -> tuple[str, str, Any]:
+        """Splits a range filter into its field, operator and numeric operand: a float, or a tuple of floats for __in,
+        which also accepts a single value. Numeric strings are accepted as exact filters accept them.
+        """
+        field, _, op = key.rpartition("__")
+        if field not in self._MODEL_CLS.RANGE_FIELDS or op not in RANGE_OPERATORS:
+            raise ValueError(f"Unsupported filter: {key}")
+
+        try:
+            if op != "in":
+                return field, op, float(value)
+            if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+                value = (value,)
+            return field, op, tuple(float(v) for v in value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Expected a number for {key}, got {value!r}") from None
+
+    def filter(
+        self,
+        *,
+        name: str = None,
+        limit: int = None,
+        offset: int = 0,
+        after: int = None,
+        order_by: str = "name",
+        **kwargs,
+    ) -> list[DTO]:
+        """Filter by exact matches on specified fields with AND logic when filtering by multiple fields. Case insensitive.
+
+        Results are ordered by order_by: "id" or one of the model's ORDER_FIELDS, prefixed with "-" for descending order, with ties broken by ID and items without a value last. Pages are read with limit and either offset or after, the ID of the last item of the previous page. Only the requested page is ordered and built, from a permutation presorted on the first filter() ordered by that field.
+        """
+        if offset < 0:
+            raise ValueError(f"Unsupported offset: {offset}")
+
+        kwargs["name"] = name
+        matches = self._match_filters(kwargs)
 
         # short circuit
-        if not filter_kws:
+        if matches is None:
             return []
 
-        for key, value in filter_kws.items():
-            matches = self._filter_index.get(filter_kw=key, field_value=value)
+        ids = self._order_ids(matches, order_by, offset, limit, after)
+        return [self._cache[id].to_dto() for id in ids]
+
+    def count(self, **filters) -> int:
+        """Number of items matching the same filters as filter(), or of all items without any, without building them."""
+        matches = self._match_filters(filters)
+        return len(self._cache) if matches is None else matches.count()
+
+    def exists(self, **filters) -> bool:
+        """Whether any item matches the same filters as filter(), without building it."""
+        return self.count(**filters) > 0
+
+    def ids(self, **filters) -> array:
+        """Sorted IDs of the items matching the same filters as filter(), or of all items without any, as a compact array('I') without building them."""
+        ids = self._filter_ids(filters)
+        return array("I", sorted(self._cache.keys()) if ids is None else ids)
+
+    def _order_ids(
+        self,
+        matches: FilterMatches,
+        order_by: str,
+        offset: int,
+        limit: int | None,
+        after: int | None,
+    ) -> Sequence[int]:
+        """Returns a page of the matches in the order of order_by (see filter())."""
+        field = order_by.lstrip("-")
+        if field != "id" and field not in self._MODEL_CLS.ORDER_FIELDS:
+            raise ValueError(f"Unsupported order: {order_by}")
+        if order_by not in (field, f"-{field}"):
+            raise ValueError(f"Unsupported order: {order_by}")
+
+        # nothing can match, so the order isn't worth loading
+        if not matches.estimate():
+            return []
 
-            # short circuit if any field fails to match, all or nothing
-            if not matches:
-                return []
+        ids = matches.ids
+        if field != "id" or matches.ranges:
+            return self._load_order_index(order_by).page(matches, offset, limit, after)
 
-            if results is None:
-                results = matches
-            else:
-                results &= matches
-        results_list = [self._cache[id] for id in list(results)[:limit]]
-        results_list.sort(key=lambda r: r.name)  # sort alphabetically by name
-        return [r.to_dto() for r in results_list]
+        # the exact filters' IDs are already in order
+        if not order_by.startswith("-"):
+            start = offset + (bisect_right(ids, after) if after is not None else 0)
+            return ids[start : None if limit is None else start + limit]
+        stop = (bisect_left(ids, after) if after is not None else len(ids)) - offset
+        start = 0 if limit is None else max(stop - limit, 0)
+        return ids[start : max(stop, 0)][::-1]
 
     def search(
-        self, query: str, limit: int = None, **kwargs
-    ) -> list[tuple[DTO, float]]:
+        self,
+        query: str,
+        limit: int = None,
+        prominence: float = 0.0,
+        explain: bool = False,
+        deadline_ms: float | None = None,
+        max_candidates: int | None = None,
+        **kwargs,
+    ) -> SearchResults | tuple[SearchResults, SearchExplanation]:
+        """Fuzzy search, optionally restricted to the items matching the same filters as filter() before any candidate is scored. With prominence (0-1), results are ranked by a blend of their score and the item's prominence (e.g. population), which makes up that share of the returned score.
+
+        With explain=True, returns (results, SearchExplanation): the stages the search ran with their timings, posting list sizes, candidate counts per tier and the per-field contributions to each result's score. Explained searches bypass the query cache.
+
+        deadline_ms and max_candidates bound the search's latency: candidates are scored best first and once either runs out, the best results found so far are returned with results.partial set. Partial results are not cached.
+        """
+        self._load_search_index()
+
+        filters = {k: v for k, v in kwargs.items() if v is not None}
+        key = (
+            "search",
+            self._search_index._normalize_query(query) if query else query,
+            limit,
+            prominence,
+            tuple(sorted((k, normalize(str(v))) for k, v in filters.items())),
+        )
+
+        def run_query(explanation: SearchExplanation | None = None):
+            start = perf_counter()
+            ids = self._filter_ids(filters) if filters else None
+            if ids is not None:
+                ids = set(ids)
+            if explanation is not None and filters:
+                explanation.add_time("filters", start)
+
+            # the token index only serves multi-token queries, the opt-in deletion index only short ones
+            tokens = deletions = phonetics = None
+            if query and len(query.split()) > 1:
+                self._load_token_index()
+                tokens = self._token_index
+            if (
+                self._deletion_distance is not None
+                and query
+                and len(key[1]) <= DeletionIndex.MAX_QUERY_LENGTH
+            ):
+                self._load_deletion_index()
+                deletions = self._deletion_index
+            if self._phonetic_enabled and query:
+                self._load_phonetic_index()
+                phonetics = self._phonetic_index
+
+            return self._search_index.search(
+                query=query,
+                limit=limit,
+                ids=ids,
+                prominence=prominence,
+                tokens=tokens,
+                deletions=deletions,
+                phonetics=phonetics,
+                explain=explanation,
+                deadline_ms=deadline_ms,
+                max_candidates=max_candidates,
+            )
+
+        if explain:
+            explanation = SearchExplanation()
+            results = run_query(explanation)
+            return self._search_results(results), explanation
+
+        results = self._cached_query(key, run_query)
+        return self._search_results(results)
+
+    def _load_search_indexes(self, filters: dict):
+        """Loads every index a search with these filters may use, so that batch workers inherit them from the parent
+        instead of each loading its own copy."""
         self._load_search_index()
-        results = self._search_index.search(query=query, limit=limit)
-        return [(r.to_dto(), score) for r, score in results]
+        self._load_token_index()
+        if self._deletion_distance is not None:
+            self._load_deletion_index()
+        if self._phonetic_enabled:
+            self._load_phonetic_index()
+        if any("__" in key for key in filters):
+            self._load_range_index()
+
+    def _search_results(self, results: SearchResults) -> SearchResults:
+        return SearchResults(
+            [(r.to_dto(), score) for r, score in results], partial=results.partial
+        )
+
+    def search_many(
+        self, queries: Iterable[str], limit: int = None, workers: int = None, **kwargs
+    ) -> list[list[tuple[DTO, float]]]:
+        """Searches many queries at once, returning one result list per query in input order. Identical queries (after normalization) are only searched once. With workers > 1, queries are fanned out to a pool of forked processes that share the already loaded indexes."""
+        # load before forking so workers inherit them
+        self._load_search_indexes({k: v for k, v in kwargs.items() if v is not None})
+
+        queries = list(queries)
+        keys = [self._search_index._normalize_query(q) if q else q for q in queries]
+        return self._map_unique("search", queries, keys, workers, limit=limit, **kwargs)
@@ -5,6 +5,8 @@ from localis.registries import Registry, CountryRegistry
 class SubdivisionRegistry(Registry[Subdivision]):
     REGISTRY_NAME = "subdivisions"
     _MODEL_CLS = SubdivisionModel
+    _TOKEN_CONTEXT_FILTERS = ("country",)
+    _COMPLETE_RANK_FIELD = "admin_level"
 
     def __init__(self, countries: CountryRegistry, **kwargs):
         self._countries = countries
@@ -17,6 +19,15 @@ class SubdivisionRegistry(Registry[Subdivision]):
         """Get a subdivision by its id, iso_code, or geonames_code."""
         return super().lookup(identifier)
 
+    def complete(
+        self, prefix: str, limit: int = 10, country: str = None
+    ) -> list[Subdivision]:
+        """Typeahead completion of subdivision names and aliases, admin level 1 first. Optionally within a country (name, alpha2, alpha3)."""
+        return super().complete(prefix, limit, country)
+
+    def _complete_rank(self, admin_level: int | None) -> float:
+        return -(admin_level or 0)
+
     def filter(
         self,
         *,
@@ -27,23 +38,50 @@ class SubdivisionRegistry(Registry[Subdivision]):
         country: str = None,
         **kwargs,
     ) -> list[SubdivisionModel]:
-        """Filter subdivisions by exact matches on specified fields with AND logic when filtering by multiple fields. Case insensitive."""
-        kwargs = {
-            "type": type,
-            "admin_level": admin_level,
-            "country": country,
-        }
+        """Filter subdivisions by exact matches on specified fields with AND logic when filtering by multiple fields. Case insensitive. admin_level can also be filtered by range (e.g. admin_level__in=[1, 2], admin_level__lte=2)."""
+        kwargs.update(type=type, admin_level=admin_level, country=country)
 
         return super().filter(name=name, limit=limit, **kwargs)
 
     def search(
-        self, query, limit=None, **kwargs
+        self,
+        query,
+        limit=None,
+        *,
+        prominence: float = 0.0,
+        name: str = None,
+        type: str = None,
+        admin_level: int = None,
+        country: str = None,
+        explain: bool = False,
+        deadline_ms: float = None,
+        max_candidates: int = None,
+        **kwargs,
     ) -> list[tuple[SubdivisionModel, float]]:
-        """Fuzzy search for subdivisions by name, aliases, parent name, or country name"""
-        return super().search(query, limit, **kwargs)
+        """Fuzzy search for subdivisions by name, aliases, parent name, or country name. Can be scoped with the same filters as filter(). With prominence (0-1), admin level 1 subdivisions rank higher."""
+        return super().search(
+            query=query,
+            limit=limit,
+            prominence=prominence,
+            name=name,
+            type=type,
+            admin_level=admin_level,
+            country=country,
+            explain=explain,
+            deadline_ms=deadline_ms,
+            max_candidates=max_candidates,
+            **kwargs,
+        )
+
+    def _search_prior(self, model: SubdivisionModel) -> float:
+        return 1.0 / (model.admin_level or 1)
 
 
-# singleton
-from localis.registries.country_registry import countries
+# ----------- SINGLETON ----------- #
+def __getattr__(name: str):
+    # the shared instance is created on first access, see localis.__getattr__
+    if name == "subdivisions":
+        import localis
 
-subdivisions = SubdivisionRegistry(countries=countries)
+        return localis.subdivisions
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,9 +2,15 @@ import unicodedata
 import re
 from unidecode import unidecode
 import base64
+from array import array
+from bisect import bisect_left
 
 SPACE_RE = re.compile(r"\s+")
 
+# punctuation removed from normalized names and queries before they are matched
+REMOVE_CHARS = (",", ".")
+REMOVE_TABLE = str.maketrans("", "", "".join(REMOVE_CHARS))
+
 
 def normalize(s: str, lower: bool = True) -> str:
     """Custom transliteration of a string into an ASCII-only search form with optional lowercasing (default=True)."""
@@ -28,15 +34,92 @@ def generate_trigrams(s: str):
         yield s[i : i + 3]
 
 
+# Phonetic keys reduce a normalized string to the skeleton of its consonant sounds, so transliteration variants
+# ("kiev"/"kyiv", "peking"/"beijing") share a key. Digraphs are simplified first, then consonants are grouped into
+# classes that are often confused across transliterations; vowels, "h" and "y" are dropped and repeats collapsed.
+PHONETIC_DIGRAPHS = (
+    ("sch", "s"),
+    ("tch", "c"),
+    ("ch", "c"),
+    ("sh", "s"),
+    ("zh", "j"),
+    ("ph", "f"),
+    ("th", "t"),
+    ("kh", "k"),
+    ("gh", "g"),
+    ("ck", "k"),
+)
+PHONETIC_TABLE = str.maketrans("bpfvwcgjkqsxzdtmnlr", "ppfffkkkkksssttmnlr", "aeiouyh")
+NON_ALPHA_RE = re.compile(r"[^a-z ]+")
+
+
+def phonetic_key(s: str) -> str:
+    """Phonetic key of a normalized string, keeping one key per token."""
+    s = NON_ALPHA_RE.sub(" ", s)
+    for digraph, replacement in PHONETIC_DIGRAPHS:
+        s = s.replace(digraph, replacement)
+
+    keys = []
+    for token in s.translate(PHONETIC_TABLE).split():
+        key = token[0]
+        for ch in token[1:]:
+            if ch != key[-1]:
+                key += ch
+        keys.append(key)
+    return " ".join(keys)
+
+
+# A running intersection this many times shorter than the next posting list is probed in it by binary search,
+# otherwise they are intersected as sets in C
+PROBE_RATIO = 32
+
+
+def intersect_sorted(postings: list) -> list[int] | array:
+    """Intersects sorted ID sequences (lists or arrays), smallest first, returning the sorted common IDs. Sets may be
+    given besides at least one sequence and are probed in C rather than scanned. A single sequence is returned as is.
+    """
+    sets = [p for p in postings if isinstance(p, (set, frozenset))]
+    postings = [p for p in postings if not isinstance(p, (set, frozenset))]
+    shortest = min(map(len, postings))
+    # a set much smaller than every sequence is sorted and probed in them instead
+    postings.extend(sorted(ids) for ids in sets if len(ids) * PROBE_RATIO < shortest)
+    postings.sort(key=len)
+
+    result = postings[0]
+    for ids in sets:
+        if len(ids) * PROBE_RATIO >= shortest:
+            result = list(filter(ids.__contains__, result))
+    for posting in postings[1:]:
+        if not result:
+            break
+        if len(result) * PROBE_RATIO >= len(posting):
+            result = sorted(set(result).intersection(posting))
+            continue
+
+        # probe: each ID is binary searched for from the previous match on
+        found = []
+        n = len(posting)
+        lo = 0
+        for id in result:
+            lo = bisect_left(posting, id, lo)
+            if lo == n:
+                break
+            if posting[lo] == id:
+                found.append(id)
+        result = found
+    return result
+
+
 # The search indexes store tens of thousands of trigrams and some have thousands of associated IDs.
 # To reduce the size of these indexes on disk, we encode the list of IDs for each trigram using
-# base64-encoded varint delta encoding, which must be decoded on load.
-def decode_id_list(b64: str) -> list[int]:
-    """Convert base64(varint(delta(ids))) → [1,5,6,...]."""
+# base64-encoded varint delta encoding, which must be decoded on load. Data trees built before the binary
+# postings pack (see localis.pack) only hold this format.
+def decode_id_list(b64: str) -> array:
+    """Convert base64(varint(delta(ids))) → array('I', [1,5,6,...])."""
+    out = array("I")
     if not b64:
-        return []
+        return out
     data = base64.b64decode(b64)
-    out = []
     prev = 0
 
     i = 0
@@ -0,0 +1,73 @@
+import asyncio
+from localis import aio
+from localis.registries import Registry
+from localis.models import DTO
+from utils import registry_param
+
+
+@registry_param
+class TestAio:
+    """AIO"""
+
+    def _async(self, registry: Registry) -> aio.AsyncRegistry:
+        return getattr(aio, registry.REGISTRY_NAME)
+
+    def test_search(self, registry: Registry, select_random):
+        """should return the same results as the sync registry"""
+        subject: DTO = select_random(registry)
+        results = asyncio.run(self._async(registry).search(subject.name, limit=5))
+        assert results == registry.search(subject.name, limit=5)
+
+    def test_lookup(self, registry: Registry):
+        """should return None with a bad lookup value"""
+        result = asyncio.run(self._async(registry).lookup("nonexistent_12345"))
+        assert result is None
+
+    def test_coalesce(self, registry: Registry, select_random):
+        """should run identical in-flight calls once, giving each caller its own copy of the results"""
+        subject: DTO = select_random(registry)
+
+        async def run():
+            reg = self._async(registry)
+            return await asyncio.gather(
+                reg.search(subject.name, limit=5), reg.search(subject.name, limit=5)
+            )
+
+        first, second = asyncio.run(run())
+        assert first == second
+        first.clear()
+        assert second
+
+    def test_coalesce_explain(self, registry: Registry, select_random):
+        """should give each caller of an explained search its own explanation"""
+        subject: DTO = select_random(registry)
+
+        async def run():
+            reg = self._async(registry)
+            query = dict(query=subject.name, limit=5, explain=True)
+            return await asyncio.gather(reg.search(**query), reg.search(**query))
+
+        (first, first_explanation), (second, second_explanation) = asyncio.run(run())
+        assert first == second
+        assert first_explanation.fields == second_explanation.fields
+        name = second[0][0].name
+        first[0][0].name = "changed"
+        first_explanation.fields.clear()
+        assert second[0][0].name == name
+        assert second_explanation.fields
+
+    def test_many(self, registry: Registry, select_random):
+        """should return batch results in input order"""
+        subject: DTO = select_random(registry)
+        results = asyncio.run(
+            self._async(registry).search_many([subject.name, "zzzzzzzzz"], limit=1)
+        )
+        assert results == registry.search_many([subject.name, "zzzzzzzzz"], limit=1)
+
+
+def test_warmup():
+    """should load registries and their indexes off-loop"""
+    asyncio.run(aio.warmup("countries"))
+    import localis
+
+    assert localis.countries._search_index is not None
@@ -0,0 +1,73 @@
+from localis.registries import Registry
+from localis.models import DTO
+from localis.utils import normalize
+from utils import registry_param
+import localis
+
+
+@registry_param
+class TestComplete:
+    """COMPLETE"""
+
+    def test_invalid(self, registry: Registry):
+        """should return an empty list for a prefix nothing starts with"""
+        assert registry.complete("zzzqqqxxx") == []
+
+    def test_valid(self, registry: Registry, select_random):
+        """should only return items with a name starting with the prefix, including the subject"""
+        subject: DTO = select_random(registry)
+        name = normalize(subject.name)
+        prefix = name[: max(3, len(name) // 2)]
+
+        results = registry.complete(subject.name, limit=1000)
+        assert subject.id in [
+            r.id for r in results
+        ], f"expected {subject.name} in completions"
+
+        results = registry.complete(prefix, limit=5)
+        assert 0 < len(results) <= 5
+        for r in results:
+            names = [
+                r.name,
+                getattr(r, "official_name", None),
+                *(getattr(r, "aliases", None) or []),
+            ]
+            assert any(
+                n and normalize(n).startswith(prefix) for n in names
+            ), f"expected a name of {r.name} to start with [{prefix}]"
+
+    def test_heavy_prefix(self, registry: Registry):
+        """should return the same completions from the precomputed top k as from a full scan"""
+        registry._load_prefix_index()
+        prefix_index = registry._prefix_index
+        heavy = [p for p in prefix_index.top if p][:20]
+
+        for prefix in heavy:
+            top = prefix_index.complete(prefix, limit=prefix_index.TOP_K)
+            scanned = prefix_index.complete(prefix, limit=prefix_index.TOP_K + 1)[
+                : prefix_index.TOP_K
+            ]
+            ranks = lambda ids: [prefix_index.rank(id) for id in ids]
+            assert ranks(top) == ranks(scanned), f"top k mismatch for prefix [{prefix}]"
+
+    def test_unlimited(self, registry: Registry, select_random):
+        """should return every completion with limit=None, best ranked first"""
+        prefix = normalize(select_random(registry).name)[:2]
+
+        results = registry.complete(prefix, limit=None)
+        assert results == registry.complete(prefix, limit=len(registry))
+        assert len(results) > 0
+
+
+def test_population_rank(city: localis.City):
+    """should rank city completions by population"""
+    results = localis.cities.complete(city.name[:2], limit=20)
+    populations = [r.population or 0 for r in results]
+    assert populations == sorted(populations, reverse=True)
+
+
+def test_country(city: localis.City):
+    """should only return cities in the given country"""
+    results = localis.cities.complete(city.name, limit=50, country=city.country.alpha2)
+    assert city.id in [r.id for r in results]
+    assert all(r.country.id == city.country.id for r in results)
@@ -1,5 +1,7 @@
+import pytest
 from localis.registries import Registry
 from localis.models import DTO
+from localis import City, Subdivision, cities, subdivisions
 from utils import registry_param
 
 
@@ -33,3 +35,159 @@ class TestFilter:
         assert any(
             subject.name in [r.name] for r in results
         ), f"subject ({subject.name}) should be in results: {results}"
+
+    def test_count_exists_ids(self, registry: Registry, select_random):
+        """should count, check and list the IDs of the items filter() returns, or of every item without filters."""
+        subject: DTO = select_random(registry)
+        expected = sorted(r.id for r in registry.filter(name=subject.name))
+
+        assert list(registry.ids(name=subject.name)) == expected
+        assert registry.count(name=subject.name) == len(expected)
+        assert registry.exists(name=subject.name)
+
+        assert registry.count(name="asjh238gjs") == 0
+        assert not registry.exists(name="asjh238gjs")
+        assert registry.count() == len(registry) == len(registry.ids())
+
+
+def test_multiple_filters(city: City):
+    """should return exactly the cities matching every filter, in ID order."""
+    filters = {"name": city.name, "country": city.country.alpha2}
+    if city.admin1:
+        filters["subdivision"] = city.admin1.iso_code or city.admin1.name
+    expected = set.intersection(
+        *(
+            {r.id for r in cities.filter(limit=None, **{k: v})}
+            for k, v in filters.items()
+        )
+    )
+
+    ids = cities._filter_ids(dict(filters))
+    assert city.id in ids
+    assert list(ids) == sorted(expected)
+
+
+def test_order_and_pages(city: City):
+    """should order the results by any order field with ties by ID, and page through them by offset or cursor."""
+    country = city.country.alpha2
+    everything = cities.filter(country=country, order_by="id")
+    expected = [r.id for r in sorted(everything, key=lambda r: -(r.population or -1))]
+
+    results = cities.filter(country=country, order_by="-population")
+    assert [r.id for r in results] == expected
+
+    pages, after = [], None
+    while page := cities.filter(
+        country=country, order_by="-population", limit=10, after=after
+    ):
+        pages += [r.id for r in page]
+        after = page[-1].id
+    assert pages == expected
+
+    offset = len(expected) // 2
+    results = cities.filter(
+        country=country, order_by="-population", limit=10, offset=offset
+    )
+    assert [r.id for r in results] == expected[offset : offset + 10]
+
+    with pytest.raises(ValueError):
+        cities.filter(country=country, order_by="timezone")
+    with pytest.raises(ValueError):
+        cities.filter(country=country, order_by="-population", offset=-1)
+
+
+def test_order_no_matches(monkeypatch):
+    """should return no results without loading the order when nothing matches."""
+
+    def load_order_index(order_by):
+        raise AssertionError(f"loaded the {order_by} order")
+
+    monkeypatch.setattr(cities, "_load_order_index", load_order_index)
+    assert cities.filter(name="asjh238gjs", order_by="-population") == []
+    assert cities.filter(population__gt=10**12, order_by="-population") == []
+
+
+def test_range_pages(city: City):
+    """should page through range filter matches in order without an exact filter."""
+    population = max(city.population, 1_000_000)
+    expected = sorted(
+        cities.ids(population__gte=population),
+        key=lambda id: -cities.get(id).population,
+    )
+
+    pages, after = [], None
+    while page := cities.filter(
+        population__gte=population, order_by="-population", limit=50, after=after
+    ):
+        pages += [r.id for r in page]
+        after = page[-1].id
+    assert pages == expected
+
+
+def test_population_range(city: City):
+    """should return the cities within the population range, combined with exact filters."""
+    if city.population is None:
+        pytest.skip("city has no population")
+    population = city.population
+    results = cities.filter(
+        country=city.country.alpha2,
+        population__gte=population,
+        population__lt=population + 1,
+    )
+
+    assert city.id in [r.id for r in results]
+    assert all(r.population == population for r in results)
+    assert all(r.country.alpha2 == city.country.alpha2 for r in results)
+
+
+def test_range_count(city: City):
+    """should count the range filter matches without collecting them, the same as the IDs collected."""
+    population = city.population
+    for filters in (
+        {"population__gte": population},
+        {"population__gte": population // 2, "population__lte": population},
+        {"population__lte": population, "country": city.country.alpha2},
+    ):
+        assert cities.count(**filters) == len(cities.ids(**filters)) > 0
+        assert cities.exists(**filters)
+    assert not cities.exists(population__gt=population, population__lt=population)
+
+
+def test_admin_level_in(sub: Subdivision):
+    """should return the subdivisions with any of the given admin levels."""
+    results = subdivisions.filter(
+        country=sub.country.alpha2, admin_level__in=[sub.admin_level]
+    )
+    expected = subdivisions.filter(
+        country=sub.country.alpha2, admin_level=sub.admin_level
+    )
+
+    assert sorted(r.id for r in results) == sorted(r.id for r in expected)
+
+
+def test_range_operands(city: City, sub: Subdivision):
+    """should accept numeric strings and a single __in value, as exact filters do."""
+    population = city.population
+    assert cities.ids(population__gte=str(population)) == cities.ids(
+        population__gte=population
+    )
+
+    level = sub.admin_level
+    expected = subdivisions.ids(country=sub.country.alpha2, admin_level=level)
+    for operand in (level, str(level), [str(level)]):
+        assert (
+            subdivisions.ids(country=sub.country.alpha2, admin_level__in=operand)
+            == expected
+        )
+
+
+def test_unsupported_range():
+    """should raise on a range filter of a field or operator that isn't supported."""
+    with pytest.raises(ValueError):
+        cities.filter(name__gte="a")
+    with pytest.raises(ValueError):
+        cities.filter(population__between=1)
+    with pytest.raises(ValueError):
+        cities.count(population__gt="many")
+    with pytest.raises(ValueError):
+        subdivisions.filter(admin_level__in=["one"])
@@ -0,0 +1,124 @@
+import pytest
+import importlib
+import localis
+from localis.registries import (
+    Registry,
+    CountryRegistry,
+    SubdivisionRegistry,
+    CityRegistry,
+)
+from localis.models import DTO
+from utils import registry_param
+
+
+@pytest.fixture(scope="module")
+def lazy_registries() -> dict[str, Registry]:
+    countries = CountryRegistry(lazy=True, cache_size=64)
+    subdivisions = SubdivisionRegistry(countries=countries, lazy=True, cache_size=64)
+    cities = CityRegistry(
+        countries=countries, subdivisions=subdivisions, lazy=True, cache_size=64
+    )
+    return {
+        "CountryRegistry": countries,
+        "SubdivisionRegistry": subdivisions,
+        "CityRegistry": cities,
+    }
+
+
+@registry_param
+class TestLazy:
+    """LAZY"""
+
+    def test_len(self, registry: Registry, lazy_registries):
+        """should report the same size as an eager registry"""
+        lazy = lazy_registries[type(registry).__name__]
+        assert len(lazy) == len(registry)
+
+    def test_get(self, registry: Registry, lazy_registries, select_random):
+        """should materialize the same DTO as an eager registry"""
+        lazy = lazy_registries[type(registry).__name__]
+        subject: DTO = select_random(registry)
+        assert lazy.get(subject.id) == subject
+
+    def test_filter(
+        self, registry: Registry, lazy_registries, select_random, monkeypatch
+    ):
+        """should return the same ordered pages as an eager registry, parsing only the models returned"""
+        lazy = lazy_registries[type(registry).__name__]
+        subject: DTO = select_random(registry)
+        loader = lazy._cache._loader
+        loads = []
+        monkeypatch.setattr(
+            lazy._cache, "_loader", lambda id: loads.append(id) or loader(id)
+        )
+
+        for order_by in ("name", "-id"):
+            results = lazy.filter(name=subject.name, order_by=order_by, limit=3)
+            assert results == registry.filter(
+                name=subject.name, order_by=order_by, limit=3
+            )
+        assert len(loads) <= 6
+
+    def test_complete(
+        self, registry: Registry, lazy_registries, select_random, monkeypatch
+    ):
+        """should return the same completions as an eager registry, parsing only the models returned"""
+        lazy = lazy_registries[type(registry).__name__]
+        prefix = select_random(registry).name[:2]
+        loader = lazy._cache._loader
+        loads = []
+        monkeypatch.setattr(
+            lazy._cache, "_loader", lambda id: loads.append(id) or loader(id)
+        )
+
+        assert lazy.complete(prefix, limit=5) == registry.complete(prefix, limit=5)
+        assert len(loads) <= 5
+
+    def test_bounded(self, registry: Registry, lazy_registries):
+        """should keep no more models than its cache size"""
+        lazy = lazy_registries[type(registry).__name__]
+        for id in range(1, 200):
+            lazy.get(id)
+        assert len(lazy._cache._models) <= 64
+
+
+@pytest.fixture
+def fresh_countries(monkeypatch):
+    """Drops the countries singleton for the test, restoring it afterwards."""
+    monkeypatch.delitem(vars(localis), "countries", raising=False)
+
+
+def test_singleton(fresh_countries):
+    """should create a registry singleton on first access and reuse it after"""
+    assert "countries" not in vars(localis)
+
+    countries = localis.countries
+    assert isinstance(countries, CountryRegistry)
+    assert vars(localis)["countries"] is countries
+    assert localis.countries is countries
+
+
+def test_preload(fresh_countries):
+    """should create the registry and load its indexes with indexes=True"""
+    localis.preload("countries", indexes=True)
+
+    countries = vars(localis)["countries"]
+    assert countries._lookup_index is not None
+    assert countries._filter_index is not None
+    assert countries._search_index is not None
+
+
+def test_subpackage(monkeypatch):
+    """should import a subpackage on first access"""
+    monkeypatch.delitem(vars(localis), "registries", raising=False)
+
+    assert localis.registries is importlib.import_module("localis.registries")
+    assert localis.registries.CountryRegistry is CountryRegistry
+    assert "registries" in dir(localis)
+
+
+def test_unknown_attribute():
+    """should raise AttributeError for names that aren't registries"""
+    with pytest.raises(AttributeError):
+        localis.nonexistent
+    assert not hasattr(localis, "nonexistent")
@@ -40,3 +40,15 @@ class TestLookup:
             assert (
                 getattr(result, field) == lookup_value
             ), f"expected [{field}: {lookup_value}], got [{getattr(result, field)}]"
+
+    def test_many(self, registry: Registry, select_random):
+        """should return one result per identifier in input order"""
+        field = registry._MODEL_CLS.LOOKUP_FIELDS[0]
+        subject: DTO = select_random(registry)
+        while not getattr(subject, field):
+            subject = select_random(registry, subject.id + 1)
+
+        value = getattr(subject, field)
+        results = registry.lookup_many([value, "nonexistent_lookup_value_12345", value])
+
+        assert [r and r.id for r in results] == [subject.id, None, subject.id]
@@ -0,0 +1,94 @@
+import random
+from bisect import bisect_left
+from localis.registries import Registry
+from localis.pack import (
+    DataPack,
+    PostingsPack,
+    write_data_pack,
+    write_postings_pack,
+)
+from utils import registry_param
+
+
+@registry_param
+class TestPack:
+    """PACK"""
+
+    def test_rows(self, registry: Registry):
+        """should read the same rows in bulk, one by one and column by column."""
+        pack = DataPack(registry._pack_filepath)
+        try:
+            assert len(pack) == len(registry)
+            rows = dict(pack.rows())
+            for id in random.sample(range(1, len(pack) + 1), min(len(pack), 500)):
+                assert pack.row(id) == rows[id], f"row {id}"
+
+            for index in range(len(registry._MODEL_CLS.ROW_FORMAT)):
+                for id, value in pack.column(index):
+                    assert value == rows[id][index], f"row {id}, column {index}"
+        finally:
+            pack.close()
+
+    def test_postings(self, registry: Registry, seed):
+        """should list every item under each of its search trigrams, with IDs in ascending order."""
+        rng = random.Random(seed)
+        pack = PostingsPack(registry._search_filepath)
+        try:
+            for id in rng.sample(range(1, len(registry) + 1), min(len(registry), 200)):
+                for trigram in registry._cache[id].extract_search_trigrams():
+                    ids = pack[trigram]
+                    assert ids[bisect_left(ids, id)] == id, (id, trigram)
+
+            for key in rng.sample(sorted(pack.keys()), min(len(pack), 500)):
+                ids = pack[key]
+                assert all(a < b for a, b in zip(ids, ids[1:])), key
+        finally:
+            pack.close()
+
+
+def test_round_trip(tmp_path):
+    """should read back the written rows, storing each column in the narrowest type its values fit."""
+    rows = [
+        ("Zürich", 1, 700, -5, 2**40, 47.37689, 1 / 3),
+        (None, 0, 0, 0, 0, -122.41942, 0.5),
+        ("Zürich", None, "65535", "", None, 0.0, 1e300),
+    ]
+    path = tmp_path / "rows.pack"
+    write_data_pack(rows, "siiiiff", path)
+
+    pack = DataPack(path)
+    try:
+        assert pack.column_types == "sBHiQFf"
+        assert len(pack) == len(rows)
+        expected = [
+            ["Zürich", 1, 700, -5, 2**40, 47.37689, 1 / 3],
+            ["", 0, 0, 0, 0, -122.41942, 0.5],
+            ["Zürich", 0, 65535, 0, 0, 0.0, 1e300],
+        ]
+        assert [row for _, row in pack.rows()] == expected
+        assert [pack.row(id) for id in range(1, len(rows) + 1)] == expected
+    finally:
+        pack.close()
+
+
+def test_postings_round_trip(tmp_path):
+    """should read back the written posting lists sorted, whatever width their gaps need."""
+    index = {
+        "abc": {3, 1, 2},
+        "ab ": [5, 300],
+        "über": [70_000, 5, 2**32 - 1],
+        " x": [7],
+    }
+    path = tmp_path / "postings.pack"
+    write_postings_pack(index, path)
+
+    pack = PostingsPack(path)
+    try:
+        assert len(pack) == len(index)
+        assert {key: list(ids) for key, ids in pack.items()} == {
+            key: sorted(ids) for key, ids in index.items()
+        }
+        assert "abc" in pack and "abd" not in pack
+        assert pack.get("abd") is None
+    finally:
+        pack.close()
@@ -0,0 +1,49 @@
+import pytest
+from localis.registries import Registry
+from localis.models import DTO
+from utils import registry_param
+
+
+@pytest.fixture
+def cached(registry: Registry):
+    registry.enable_query_cache(maxsize=8)
+    yield registry
+    registry.disable_query_cache()
+
+
+@registry_param
+class TestQueryCache:
+    """QUERY CACHE"""
+
+    def test_disabled(self, registry: Registry):
+        """should report no cache info unless enabled"""
+        assert registry.query_cache_info() is None
+
+    def test_hit(self, cached: Registry, select_random):
+        """should serve a repeated, differently formatted query from the cache"""
+        subject: DTO = select_random(cached)
+        first = cached.search(subject.name, limit=5)
+        second = cached.search(f"  {subject.name.upper()} ", limit=5)
+
+        assert first == second
+        info = cached.query_cache_info()
+        assert info["hits"] == 1 and info["misses"] == 1
+
+    def test_negative(self, cached: Registry):
+        """should cache empty results"""
+        assert cached.search("zzzzzzzzz") == []
+        assert cached.search("zzzzzzzzz") == []
+        assert cached.query_cache_info()["hits"] == 1
+
+    def test_bounded(self, cached: Registry):
+        """should keep no more results than its maxsize"""
+        for i in range(20):
+            cached.lookup(f"nonexistent_{i}")
+        assert cached.query_cache_info()["size"] == 8
+
+    def test_copies(self, cached: Registry, select_random):
+        """should not let a caller mutating its results change what later hits return"""
+        subject: DTO = select_random(cached)
+        first = cached.search(subject.name, limit=5)
+        first.clear()
+        assert cached.search(subject.name, limit=5)
@@ -1,7 +1,16 @@
 import pytest
+import random
+from array import array
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Thread
+import multiprocessing
 from localis.registries import Registry
 from localis.models import DTO
 from utils import registry_param, mangle
+from localis import City, cities, subdivisions
+from localis.utils import phonetic_key, intersect_sorted
+from localis.cache import LRUCache
 
 
 @registry_param
@@ -39,3 +48,237 @@ class TestSearch:
             assert (
                 top_score >= 0.5
             ), f"should see a top score over 0.5. Top score: {top_score}"
+
+    def test_concurrent(self, registry: Registry, select_random, seed):
+        """should return the same results when searching from multiple threads."""
+        queries = [
+            mangle(select_random(registry, i).name, seed=seed + i) for i in range(8)
+        ]
+        expected = [registry.search(q, limit=5) for q in queries]
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda q: registry.search(q, limit=5), queries * 4))
+
+        assert results == expected * 4
+
+    @pytest.mark.parametrize("workers", [None, 2])
+    def test_many(self, registry: Registry, select_random, seed, workers):
+        """should return one result list per query in input order, searching duplicates once."""
+        queries = [
+            mangle(select_random(registry, i).name, seed=seed + i) for i in range(4)
+        ]
+        queries += [queries[0].upper()]
+
+        results = registry.search_many(queries, limit=3, workers=workers)
+
+        assert results == [registry.search(q, limit=3) for q in queries]
+
+    @pytest.mark.parametrize("unsafe", ["off_main_thread", "threads", "spawn"])
+    def test_many_without_fork(
+        self, registry: Registry, select_random, seed, monkeypatch, unsafe
+    ):
+        """should fan out to threads rather than fork while other threads run or fork isn't the default start method."""
+        queries = [
+            mangle(select_random(registry, i).name, seed=seed + i) for i in range(4)
+        ]
+
+        def fork(*args, **kwargs):
+            raise AssertionError("forked where forking isn't safe")
+
+        monkeypatch.setattr("localis.registries.registry.ProcessPoolExecutor", fork)
+        if unsafe == "off_main_thread":
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                results = pool.submit(
+                    registry.search_many, queries, limit=3, workers=2
+                ).result()
+        elif unsafe == "threads":
+            done = Event()
+            thread = Thread(target=done.wait)
+            thread.start()
+            try:
+                results = registry.search_many(queries, limit=3, workers=2)
+            finally:
+                done.set()
+                thread.join()
+        else:
+            monkeypatch.setattr(
+                multiprocessing, "get_start_method", lambda allow_none=False: "spawn"
+            )
+            results = registry.search_many(queries, limit=3, workers=2)
+
+        assert results == [registry.search(q, limit=3) for q in queries]
+
+    def test_explain(self, registry: Registry, select_random, seed):
+        """should return the same results with an explanation whose field contributions add up to each score."""
+        query = mangle(select_random(registry).name, seed=seed)
+
+        results, explanation = registry.search(query, limit=5, explain=True)
+
+        assert results == registry.search(query, limit=5)
+        assert explanation.stages and "total" in explanation.timings
+        assert len(explanation.fields) == len(results)
+        for (_, score), fields in zip(results, explanation.fields):
+            assert sum(fields.values()) == pytest.approx(score)
+
+    def test_budget(self, registry: Registry, select_random, seed):
+        """should return the full results within a generous budget, and flag results cut short by a tight one."""
+        query = mangle(select_random(registry).name, seed=seed)
+        expected = registry.search(query)
+
+        results = registry.search(query, deadline_ms=60_000, max_candidates=10**9)
+        assert results == expected and not results.partial
+
+        for budget in ({"max_candidates": 1}, {"deadline_ms": 0}):
+            results = registry.search(query, **budget)
+            assert results.partial or results == expected
+            scores = [score for _, score in results]
+            assert scores == sorted(scores, reverse=True)
+
+    def test_scoped(self, registry: Registry, select_random):
+        """should only return results matching the filters, including the subject."""
+        subject: DTO = select_random(registry)
+        filters = {"name": subject.name}
+        if hasattr(subject, "country"):
+            filters["country"] = subject.country.alpha2
+
+        results = registry.search(subject.name, limit=None, **filters)
+        allowed = {r.id for r in registry.filter(**filters)}
+
+        assert subject.id in [r.id for r, _ in results]
+        assert all(r.id in allowed for r, _ in results)
+
+    def test_scoped_no_match(self, registry: Registry, select_random):
+        """should return [] when the filters match nothing."""
+        subject: DTO = select_random(registry)
+        assert registry.search(subject.name, name="nonexistent_name_12345") == []
+
+
+def test_population_sort(city: City, seed):
+    """should return the same top scores with early stopping as when ranking every candidate, best first."""
+    query = mangle(city.name, seed=seed)
+    top = cities.search(query, limit=5, population_sort=True)
+    everything = cities.search(query, population_sort=True)
+
+    scores = [score for _, score in top]
+    assert scores == sorted(scores, reverse=True)
+    assert scores == [score for _, score in everything[:5]]
+
+
+def test_name_and_context(city: City, seed):
+    """should find a city by its exact name with its subdivision or country, and by its misspelled name with them."""
+    context = city.admin1.name if city.admin1 else city.country.name
+
+    results = cities.search(f"{city.name} {context}")
+    assert city.id in [r.id for r, _ in results]
+
+    results = cities.search(f"{mangle(city.name, seed=seed)} {context}")
+    if results:
+        assert results[0][1] >= 0.5
+
+
+def test_memo_eviction(monkeypatch, seed):
+    """should return the same results when the memoized search values and priors are evicted."""
+    rng = random.Random(seed)
+    queries = [
+        mangle(cities.get(rng.randint(1, len(cities))).name, seed=seed + i)
+        for i in range(5)
+    ]
+    monkeypatch.setattr(cities, "_query_cache", None)
+    expected = [cities.search(q, limit=5, prominence=0.3) for q in queries]
+
+    index = cities._search_index
+    for memo in ("priors", "search_values", "normalized_values"):
+        monkeypatch.setattr(index, memo, LRUCache(maxsize=8))
+    assert [cities.search(q, limit=5, prominence=0.3) for q in queries] == expected
+    assert len(index.search_values._data) <= 8
+
+
+def test_deadline():
+    """should stop drawing candidates from long postings once a tight deadline passes, flagging the results."""
+    query = "santa ana de los rios"
+    cities.search(query)
+
+    start = perf_counter()
+    results = cities.search(query, deadline_ms=1)
+    elapsed_ms = (perf_counter() - start) * 1000
+
+    assert results.partial
+    assert elapsed_ms < 25, f"took {elapsed_ms:.1f}ms"
+
+
+def test_exact_tokens_fill_limit():
+    """should fill the limit with trigram matches after an exact multi-token match rather than stop at it."""
+    results = subdivisions.search("new york", limit=10)
+
+    assert results[0][0].name == "New York"
+    assert len(results) == 10
+
+
+def test_misspelled_name_and_country():
+    """should rank a misspelled name within an exactly spelled country by its name, not by the country it shares
+    with every other candidate."""
+    (expected,) = subdivisions.filter(name="Daïra de Tébessa")
+
+    results = subdivisions.search("Dïra de Tébessa Algeria", limit=10)
+    assert expected.id in [r.id for r, _ in results]
+
+
+def test_typo_index(seed):
+    """should find short names with a typo through the opt-in deletion index."""
+    rng = random.Random(seed)
+    cities.enable_typo_index()
+    try:
+        cities._load_deletion_index()
+        names = [
+            n for n in cities._deletion_index.names if 4 <= len(n) <= 5 and n.isalpha()
+        ]
+        name = rng.choice(names)
+        i = rng.randrange(1, len(name))
+        query = name[:i] + ("x" if name[i] != "x" else "z") + name[i + 1 :]
+
+        results = cities.search(query)
+        assert name in [
+            r.name.lower() for r, _ in results
+        ], f"expected {name} for [{query}]"
+    finally:
+        cities.disable_typo_index()
+
+
+def test_phonetic_index(seed):
+    """should find transliteration variants through the opt-in phonetic index."""
+    rng = random.Random(seed)
+    cities.enable_phonetic_index()
+    try:
+        cities._load_phonetic_index()
+        index = cities._phonetic_index.index
+        names = [
+            n
+            for n in cities._filter_index.index["name"]
+            if "c" in n and "ch" not in n and n.isalpha() and len(n) >= 5
+            # keys shared by too many names aren't used as candidates
+            and len(index.get(phonetic_key(n), ())) <= 10
+        ]
+        name = rng.choice(names)
+        query = name.replace("c", "k")
+
+        results = cities.search(query, limit=None)
+        assert name in [
+            r.name.lower() for r, _ in results
+        ], f"expected {name} for [{query}]"
+    finally:
+        cities.disable_phonetic_index()
+
+
+def test_intersect_sorted(seed):
+    """should intersect sorted lists, arrays and sets of any relative sizes into the sorted common IDs."""
+    rng = random.Random(seed)
+    for _ in range(200):
+        operands = []
+        for _ in range(rng.randint(1, 4)):
+            ids = set(rng.sample(range(1, 100_000), rng.choice((1, 10, 1_000, 50_000))))
+            operands.append(rng.choice((sorted(ids), array("I", sorted(ids)), ids)))
+        if all(isinstance(o, set) for o in operands):
+            operands.append(sorted(operands.pop()))
+
+        expected = sorted(set.intersection(*map(set, operands)))
+        assert list(intersect_sorted(operands)) == expected